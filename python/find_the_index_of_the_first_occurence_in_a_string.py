@@ -1,16 +1,194 @@
+import argparse
+import sys
+
+SCAN_CHUNK_SIZE = 1 << 20
+
+# The searchers work on str or on bytes (as long as the needles have the same
+# type as the text). feed() can be called with consecutive chunks of a stream,
+# matches that cross a chunk boundary are found and reported at their offset in
+# the whole stream.
+
+class KMPSearcher:
+    def __init__(self, needle):
+        self.needle = needle
+        # failure[i] is the length of the longest proper border of needle[:i + 1].
+        self.failure = [0] * len(needle)
+        border = 0
+        for i in range(1, len(needle)):
+            while border and needle[i] != needle[border]:
+                border = self.failure[border - 1]
+            if needle[i] == needle[border]:
+                border += 1
+            self.failure[i] = border
+        self.reset()
+
+    def reset(self):
+        self.matched = 0
+        self.position = 0
+
+    def find_all(self, text):
+        self.reset()
+        return self.scan(text)
+
+    def feed(self, chunk) -> list[int]:
+        return list(self.scan(chunk))
+
+    def scan(self, chunk):
+        needle, failure, matched = self.needle, self.failure, self.matched
+        length = len(needle)
+        if not length:
+            # The empty needle matches at every offset, the end of the stream
+            # included, `matched` is the next offset to report.
+            self.position += len(chunk)
+            self.matched = self.position + 1
+            yield from range(matched, self.position + 1)
+            return
+        for i, char in enumerate(chunk):
+            while matched and needle[matched] != char:
+                matched = failure[matched - 1]
+            if needle[matched] == char:
+                matched += 1
+                if matched == length:
+                    matched = failure[matched - 1]
+                    self.matched = matched
+                    yield self.position + i - length + 1
+        self.matched = matched
+        self.position += len(chunk)
+
+class AhoCorasickSearcher:
+    def __init__(self, needles):
+        self.needles = list(needles)
+        if not all(self.needles):
+            raise ValueError("Needles can not be empty.")
+        # A trie of the needles, state 0 is the root.
+        self.goto = [{}]
+        self.outputs = [[]]
+        for needle_id, needle in enumerate(self.needles):
+            state = 0
+            for char in needle:
+                if char not in self.goto[state]:
+                    self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.outputs.append([])
+                state = self.goto[state][char]
+            self.outputs[state].append(needle_id)
+        # Breadth first, so the failure state of a parent is known before its
+        # children. A state also outputs the needles of its failure state.
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self.fail[state]
+                    while fallback and char not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+        self.lengths = [len(needle) for needle in self.needles]
+        # Transitions that follow failure links, added as they are first taken.
+        self.transitions = [dict(edges) for edges in self.goto]
+        self.reset()
+
+    def reset(self):
+        self.state = 0
+        self.position = 0
+
+    def find_all(self, text):
+        self.reset()
+        return self.scan(text)
+
+    def feed(self, chunk) -> list[tuple[int, int]]:
+        return list(self.scan(chunk))
+
+    def scan(self, chunk):
+        # Yields (offset, needle index) for every match that ends in chunk.
+        transitions, outputs, lengths, state = self.transitions, self.outputs, self.lengths, self.state
+        for i, char in enumerate(chunk):
+            next_state = transitions[state].get(char)
+            if next_state is None:
+                next_state = self.follow(state, char)
+            state = next_state
+            if outputs[state]:
+                self.state = state
+                end = self.position + i + 1
+                for needle_id in outputs[state]:
+                    yield end - lengths[needle_id], needle_id
+        self.state = state
+        self.position += len(chunk)
+
+    def follow(self, state, char):
+        target = state
+        while target and char not in self.goto[target]:
+            target = self.fail[target]
+        next_state = self.goto[target].get(char, 0)
+        self.transitions[state][char] = next_state
+        return next_state
+
+def scan_stream(searcher, chunks):
+    searcher.reset()
+    for chunk in chunks:
+        yield from searcher.scan(chunk)
+
 class Solution:
     def strStr(self, haystack: str, needle: str) -> int:
-        ptr = 0
-        i = 0
-        while i < len(haystack):
-            if haystack[i] == needle[ptr]:
-                ptr += 1
-                if ptr == len(needle):
-                    return i - len(needle) + 1
-            else:
-                i -= ptr
-                ptr = 0
-            i += 1
-        return -1
-
-print(Solution().strStr("mississippi", "issip"))
\ No newline at end of file
+        return next(KMPSearcher(needle).find_all(haystack), -1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the index of the first occurrence in a string")
+    subparsers = parser.add_subparsers(dest="command")
+    scan_parser = subparsers.add_parser("scan", help="Print the byte offset and needle of every match in a file, in a single pass")
+    scan_parser.add_argument("--input", "-i", default="-", help="Input file, or - for stdin")
+    scan_parser.add_argument("--needle", "-n", action="append", default=[], help="Needle to search for, can be repeated")
+    scan_parser.add_argument("--needles-file", default=None, help="File with one needle per line")
+    scan_parser.add_argument("--chunk-size", type=int, default=SCAN_CHUNK_SIZE, help="Bytes read at a time")
+    args = parser.parse_args()
+    if args.command == "scan":
+        needles = list(args.needle)
+        if args.needles_file:
+            with open(args.needles_file) as fin:
+                needles.extend(line.rstrip("\n") for line in fin if line.rstrip("\n"))
+        searcher = AhoCorasickSearcher([needle.encode() for needle in needles])
+        fin = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        with fin:
+            for offset, needle_id in scan_stream(searcher, iter(lambda: fin.read(args.chunk_size), b"")):
+                print(f"{offset}\t{needles[needle_id]}")
+    else:
+        print(Solution().strStr("mississippi", "issip"))
+
+if __name__ == "__main__":
+    main()
+
+def naive_find_all(text, needle):
+    return [idx for idx in range(len(text) - len(needle) + 1) if text[idx:idx + len(needle)] == needle]
+
+def random_chunks(rng, text):
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(3))
+    return [text[start:stop] for start, stop in zip([0] + cuts, cuts + [len(text)])]
+
+def test_str_str():
+    assert Solution().strStr("mississippi", "issip") == 4
+    assert Solution().strStr("abc", "") == 0
+    assert Solution().strStr("", "a") == -1
+    assert Solution().strStr("a" * 10000 + "b", "a" * 5000 + "b") == 5000
+
+def test_kmp_across_chunks():
+    import random
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice("ab") for _ in range(rng.randint(0, 30)))
+        needle = "".join(rng.choice("ab") for _ in range(rng.randint(0, 4)))
+        searcher = KMPSearcher(needle)
+        assert list(searcher.find_all(text)) == naive_find_all(text, needle)
+        assert list(scan_stream(searcher, random_chunks(rng, text))) == naive_find_all(text, needle), (text, needle)
+
+def test_aho_corasick_across_chunks():
+    import random
+    rng = random.Random(1)
+    for _ in range(2000):
+        text = "".join(rng.choice("ab") for _ in range(rng.randint(0, 30))).encode()
+        needles = list({"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))).encode() for _ in range(4)})
+        expected = sorted((idx, needle_id) for needle_id, needle in enumerate(needles) for idx in naive_find_all(text, needle))
+        searcher = AhoCorasickSearcher(needles)
+        assert sorted(searcher.find_all(text)) == expected
+        assert sorted(scan_stream(searcher, random_chunks(rng, text))) == expected, (text, needles)
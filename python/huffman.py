@@ -2,24 +2,90 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import ClassVar, Generator, List
 import io
+import mmap
 import pathlib
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
 import argparse
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import platform
+import tempfile
+import random
+import sys
+import time
 
 # Huffman Encoding/Decoding Algorithm
 #
 # Usage:
 #  - Encode: `python huffman.py encode --input example.txt --output example.zhf`
 #  - Decode: `python huffman.py decode --input example.zhf --output example.txt`
+#  - Decode bit by bit: `python huffman.py decode --decoder bit --input example.zhf --output example.txt`
+#  - Encode any bytes (e.g. UTF-8 or binary): `python huffman.py encode --binary --input example.bin --output example.zhf`
+#  - Encode/decode in parallel blocks: `python huffman.py encode --jobs 8 --input example.txt --output example.zhf`
+#  - Encode in a single pass, e.g. in a pipe: `tail -f app.log | python huffman.py encode --input - --output - > app.zhf`
+#  - Build a seek index for random access: `python huffman.py index --input example.zhf`
+#  - Benchmark tree construction: `python huffman.py benchmark-tree`
+#  - Benchmark throughput: `python huffman.py benchmark --sizes 1M,100M,1G --corpora text,logs,skewed --output results.json`
 #
 # File format:
 #  - Binary file format
-#  - Only ASCII is supported
+#  - Characters are bytes: encoding checks for ASCII input unless binary
+#    mode is used, which accepts all 256 byte values
 #  - Uses extension .zhf
 #  - The length of the arrays is described before the array
-#  - The frequency table uses a (character, occurance_count) tuple
+#  - Version 2 stores canonical Huffman codes, which are fully described by
+#    the number of codes of each length and the characters in code order
+#  - Version 1 stored a (character, occurance_count) frequency table instead,
+#    and is still supported for decoding
+#  - Version 3 is the blocked variant of version 2: the input is split into
+#    blocks that share one code table, and each block is encoded as its own
+#    message so blocks can be encoded and decoded independently
+#  - Version 4 is adaptive: the code tree starts empty and is updated after
+#    every character (FGK algorithm), so it is encoded in a single pass and
+#    has no code table or message length in the header
 # 
-# Layout:
+# Layout (version 2):
+#  - File format constant (int32)
+#  - File format version (int8)
+#  - Maximum code length (int8)
+#  - Number of codes per code length, starting at length 1 (int16[])
+#  - Characters sorted by (code length, character) (int8[])
+#  - Encoded message length (int32)
+#  - Encoded message used bits (int8)
+#  - Encoded message data (int8[])
+#
+# Layout (version 3):
+#  - File format constant (int32)
+#  - File format version (int8)
+#  - Code lengths, as in version 2
+#  - Block count (int32)
+#  - Block index (tuple(int64 byte offset of the block in the file, int32 symbol count)[])
+#  - Blocks, each laid out as an encoded message of version 2:
+#    (int32 length, int8 used bits, int8[] data)
+#
+# Layout (version 4):
+#  - File format constant (int32)
+#  - File format version (int8)
+#  - Encoded message data (int8[]), in which the first occurence of a character
+#    is the code of the NYT (not yet transmitted) node followed by the character
+#    as 9 bits. The message ends with the NYT code followed by 256 as 9 bits.
+#
+# Seek index (sidecar file <name>.zhf.zhi, for version 1 and 2 files):
+#  - Seek index constant (int32)
+#  - Seek index version (int8)
+#  - Encoded message length of the indexed file (int32)
+#  - Size in bytes and modification time in nanoseconds of the indexed file (int64, int64)
+#  - Interval, the number of characters between entries (int32)
+#  - Entry count (int32)
+#  - Bit offsets into the encoded message of every interval-th character (int64[])
+#
+# Layout (version 1):
 #  - File format constant (int32)
 #  - File format version (int8)
 #  - Frequency table length (int32)
@@ -29,18 +95,37 @@ import argparse
 #  - Encoded message data (int8[])
 
 FILE_FORMAT_CONSTANT = 0x5A4846
-FILE_FORMAT_VERSION = 1
+FILE_FORMAT_VERSION = 2
+FILE_FORMAT_VERSION_BLOCKED = 3
+FILE_FORMAT_VERSION_ADAPTIVE = 4
+SUPPORTED_FILE_FORMAT_VERSIONS = (1, 2, 3, 4)
+ADAPTIVE_END_OF_MESSAGE = 256
+SEEK_INDEX_CONSTANT = 0x5A4849
+SEEK_INDEX_VERSION = 3
+
+# Number of bits the table decoder looks up at once. Codes longer than this
+# fall back to a slower per-length lookup.
+DEFAULT_TABLE_BITS = 10
+DECODE_CHUNK_SIZE = 65536
+ENCODE_CHUNK_SIZE = 1 << 20
+DEFAULT_BLOCK_SIZE = 1 << 20
+DEFAULT_SEEK_INTERVAL = 65536
+BENCHMARK_CHUNK_SIZE = 1 << 20
+BENCHMARK_CORPORA = ("text", "logs", "skewed", "uniform")
+BENCHMARK_MODES = ("static", "blocked", "adaptive")
+# Sample size used by count_characters to find the most common characters.
+COUNT_SAMPLE_SIZE = 4096
 
 @dataclass
 class Node:
     id: int
     parent: Node | None
-    character: str | None
+    character: int | None
     weight: int
     children: List[Node]
     _id_counter: ClassVar[int] = 0
     @staticmethod
-    def new_leaf(character: str | None, weight: int):
+    def new_leaf(character: int | None, weight: int):
         Node._id_counter += 1
         return Node(Node._id_counter, None, character, weight, [])
     @staticmethod
@@ -50,101 +135,158 @@ class Node:
     def __eq__(self, other):
         return isinstance(other, Node) and self.id == other.id
 
-class BitBuffer:
-    write_bit_buffer: int = 0
-    write_bit_position: int = 0
-    def write_bit(self, stream: io.BufferedWriter, value: int):
-        assert value == 0 or value == 1
-        mask = value << (8 - self.write_bit_position - 1)
-        self.write_bit_buffer |= mask
-        self.write_bit_position += 1
-        if self.write_bit_position >= 8:
-            write_int8(stream, self.write_bit_buffer)
-            self.write_bit_buffer = 0
-            self.write_bit_position = 0
-    def flush_bit_buffer(self, stream: io.BufferedWriter):
-        if self.write_bit_position != 0:
-            write_int8(stream, self.write_bit_buffer)
-
 def write_int8(stream: io.BufferedWriter, value: int) -> None:
     stream.write(value.to_bytes(1, "big"))
 
+def write_int16(stream: io.BufferedWriter, value: int) -> None:
+    stream.write(value.to_bytes(2, "big"))
+
 def write_int32(stream: io.BufferedWriter, value: int) -> None:
     stream.write(value.to_bytes(4, "big"))
 
+def write_int64(stream: io.BufferedWriter, value: int) -> None:
+    stream.write(value.to_bytes(8, "big"))
+
 def read_int8(stream: io.BufferedReader) -> int:
     return int.from_bytes(stream.read(1), "big")
 
+def read_int16(stream: io.BufferedReader) -> int:
+    return int.from_bytes(stream.read(2), "big")
+
 def read_int32(stream: io.BufferedReader) -> int:
     return int.from_bytes(stream.read(4), "big")
 
-def pop_min_node(nodes: List[Node]) -> Node:
-    min_index = 0
-    min_weight = 1e99
-    for i, node in enumerate(nodes):
-        if node.weight < min_weight:
-            min_index = i
-            min_weight = node.weight
-    return nodes.pop(min_index)
+def read_int64(stream: io.BufferedReader) -> int:
+    return int.from_bytes(stream.read(8), "big")
 
 class HuffmanTree:
-    def __init__(self, root: Node, encoding_table: dict[str, Node]):
+    def __init__(self, root: Node, encoding_table: dict[int, Node]):
         self.root = root
         self.encoding_table = encoding_table
     @staticmethod
-    def new(frequency_list: List[tuple[str, int]]):
-        nodes = []
-        encoding_table: dict[str, Node] = {}
-        for character, occurance in frequency_list:
+    def new(frequency_list: List[tuple[int, int]]):
+        # Ties on weight are broken by insertion order: leaves in the order of
+        # `frequency_list`, followed by merged nodes in the order they are created.
+        nodes: List[tuple[int, int, Node]] = []
+        encoding_table: dict[int, Node] = {}
+        for order, (character, occurance) in enumerate(frequency_list):
             node = Node.new_leaf(character, occurance)
-            nodes.append(node)
+            nodes.append((occurance, order, node))
             encoding_table[character] = node
+        if not nodes:
+            return HuffmanTree(Node.new_leaf(None, 0), encoding_table)
+        heapq.heapify(nodes)
+        order = len(nodes)
         while len(nodes) >= 2:
-            last_node = pop_min_node(nodes)
-            second_last_node = pop_min_node(nodes)
+            _, _, last_node = heapq.heappop(nodes)
+            _, _, second_last_node = heapq.heappop(nodes)
             merged_weight = last_node.weight + second_last_node.weight
             merged_node = Node.new_node(merged_weight, left=second_last_node, right=last_node)
             last_node.parent = merged_node
             second_last_node.parent = merged_node
-            nodes.append(merged_node)
-        return HuffmanTree(nodes[0], encoding_table)
+            heapq.heappush(nodes, (merged_weight, order, merged_node))
+            order += 1
+        return HuffmanTree(nodes[0][2], encoding_table)
+    @staticmethod
+    def from_codes(codes: dict[int, tuple[int, int]]):
+        root = Node.new_leaf(None, 0)
+        encoding_table: dict[int, Node] = {}
+        for character, (code, length) in codes.items():
+            current = root
+            for shift in range(length - 1, -1, -1):
+                if not current.children:
+                    current.children = [Node.new_leaf(None, 0), Node.new_leaf(None, 0)]
+                    for child in current.children:
+                        child.parent = current
+                current = current.children[(code >> shift) & 1]
+            current.character = character
+            encoding_table[character] = current
+        return HuffmanTree(root, encoding_table)
+    def code_lengths(self) -> dict[int, int]:
+        # A tree with a single character still needs one bit per character.
+        return {character: max(length, 1) for character, (_, length) in self.code_table().items()}
+    def code_table(self) -> dict[int, tuple[int, int]]:
+        codes: dict[int, tuple[int, int]] = {}
+        stack: List[tuple[Node, int, int]] = [(self.root, 0, 0)]
+        while stack:
+            node, code, length = stack.pop()
+            if not node.children:
+                if node.character is not None:
+                    codes[node.character] = (code, length)
+                continue
+            for bit, child in enumerate(node.children):
+                stack.append((child, (code << 1) | bit, length + 1))
+        return codes
+
+def canonical_codes(code_lengths: dict[int, int]) -> dict[int, tuple[int, int]]:
+    codes: dict[int, tuple[int, int]] = {}
+    code = 0
+    previous_length = 0
+    for character, length in sorted(code_lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codes[character] = (code, length)
+        code += 1
+        previous_length = length
+    return codes
+
+def canonical_code_strings(code_lengths: dict[int, int]) -> dict[int, str]:
+    return {character: format(code, f"0{length}b") for character, (code, length) in canonical_codes(code_lengths).items()}
+
+def write_code_lengths(stream: io.BufferedWriter, code_lengths: dict[int, int]) -> None:
+    max_code_length = max(code_lengths.values(), default=0)
+    write_int8(stream, max_code_length)
+    counts = Counter(code_lengths.values())
+    for length in range(1, max_code_length + 1):
+        write_int16(stream, counts[length])
+    for character, _ in sorted(code_lengths.items(), key=lambda item: (item[1], item[0])):
+        write_int8(stream, character)
+
+def read_code_lengths(stream: io.BufferedReader) -> dict[int, int]:
+    max_code_length = read_int8(stream)
+    counts = [read_int16(stream) for _ in range(max_code_length)]
+    code_lengths: dict[int, int] = {}
+    for length, count in enumerate(counts, start=1):
+        for character in stream.read(count):
+            code_lengths[character] = length
+    return code_lengths
 
 class HuffmanEncoder:
     def __init__(self, tree: HuffmanTree, stream: io.BufferedWriter):
         self.tree = tree
         self.stream = stream
+        self.code_lengths = tree.code_lengths()
         self.write_header()
-        self.bit_buffer = BitBuffer()
+        self.code_strings = canonical_code_strings(self.code_lengths)
+        self.accumulator = 0
+        self.accumulator_bits = 0
     def write_header(self):
         write_int32(self.stream, FILE_FORMAT_CONSTANT)
         write_int8(self.stream, FILE_FORMAT_VERSION)
-        encoding_table_size = len(self.tree.encoding_table)
-        write_int32(self.stream, encoding_table_size)
-        for character, node in self.tree.encoding_table.items():
-            write_int8(self.stream, ord(character))
-            write_int32(self.stream, node.weight)
+        write_code_lengths(self.stream, self.code_lengths)
         self.encoded_message_size_position = self.stream.tell()
         write_int32(self.stream, 0)
         self.encoded_message_used_bits_position = self.stream.tell()
         write_int8(self.stream, 0)
-    def write(self, character) -> None:
-        current: Node = self.tree.encoding_table[character]
-        path: List[int] = []
-        while current.parent:
-            previous = current
-            current = current.parent
-            bit = current.children.index(previous)
-            path.append(bit)
-        while path:
-            self.bit_buffer.write_bit(self.stream, path.pop())
+    def write(self, character: int) -> None:
+        self.write_chunk(bytes((character,)))
+    def write_chunk(self, chunk: bytes | memoryview) -> None:
+        bits = "".join(map(self.code_strings.__getitem__, chunk))
+        if not bits:
+            return
+        total_bits = self.accumulator_bits + len(bits)
+        accumulator = (self.accumulator << len(bits)) | int(bits, 2)
+        self.accumulator_bits = total_bits % 8
+        if total_bits >= 8:
+            self.stream.write((accumulator >> self.accumulator_bits).to_bytes(total_bits // 8, "big"))
+        self.accumulator = accumulator & ((1 << self.accumulator_bits) - 1)
     def close(self):
-        self.bit_buffer.flush_bit_buffer(self.stream)
+        if self.accumulator_bits:
+            write_int8(self.stream, self.accumulator << (8 - self.accumulator_bits))
         total_bytes_written = self.stream.tell() - self.encoded_message_used_bits_position - 1
         self.stream.seek(self.encoded_message_size_position)
         write_int32(self.stream, total_bytes_written)
         self.stream.seek(self.encoded_message_used_bits_position)
-        global write_bit_position
-        write_int8(self.stream, self.bit_buffer.write_bit_position)
+        write_int8(self.stream, self.accumulator_bits)
         self.stream.seek(0)
 
 class BitReader:
@@ -167,80 +309,716 @@ class HuffmanDecoder:
         self.encoded_message_size = read_int32(stream)
         self.encoded_message_used_bits = read_int8(stream)
         self.current_node = tree.root
-    def read(self) -> Generator[str]:
+    def read(self) -> Generator[bytes]:
         for i in range(self.encoded_message_size):
-            length = 8 if i != self.encoded_message_size - 1 else self.encoded_message_used_bits
+            last_byte = i == self.encoded_message_size - 1
+            length = self.encoded_message_used_bits if last_byte and self.encoded_message_used_bits else 8
             byte = read_int8(self.stream)
             for bit in BitReader(byte, length):
                 self.current_node = self.current_node.children[bit]
-                if self.current_node.character:
-                    yield self.current_node.character
+                if self.current_node.character is not None:
+                    yield bytes((self.current_node.character,))
                     self.current_node = self.tree.root
 
+class HuffmanTableDecoder:
+    # Decodes `table_bits` bits per lookup instead of walking the tree bit by
+    # bit. Every `table_bits` wide bit pattern maps to the (character, code
+    # length) of the code it starts with. Patterns that start a longer code map
+    # to None, and are resolved by trying each longer length in `long_codes`.
+    def __init__(self, codes: dict[int, tuple[int, int]], stream: io.BufferedReader, table_bits: int = DEFAULT_TABLE_BITS):
+        self.stream = stream
+        self.table_bits = table_bits
+        self.table: List[tuple[int, int] | None] = [None] * (1 << table_bits)
+        self.long_codes: dict[tuple[int, int], int] = {}
+        self.max_code_length = 0
+        for character, (code, length) in codes.items():
+            self.max_code_length = max(self.max_code_length, length)
+            if length > table_bits:
+                self.long_codes[(length, code)] = character
+                continue
+            start = code << (table_bits - length)
+            for index in range(start, start + (1 << (table_bits - length))):
+                self.table[index] = (character, length)
+        self.encoded_message_size = read_int32(stream)
+        self.encoded_message_used_bits = read_int8(stream)
+    def read(self, bit_offset: int = 0, symbol_count: int | None = None) -> Generator[bytes]:
+        # Decodes from `bit_offset` bits into the message, and stops after
+        # `symbol_count` characters when given.
+        table = self.table
+        table_bits = self.table_bits
+        table_mask = (1 << table_bits) - 1
+        wanted_bits = max(table_bits, self.max_code_length)
+        unused_bits = (8 - self.encoded_message_used_bits) % 8
+        remaining_bits = self.encoded_message_size * 8 - unused_bits if self.encoded_message_size else 0
+        remaining_bytes = self.encoded_message_size
+        remaining_symbols = remaining_bits if symbol_count is None else symbol_count
+        chunk = b""
+        position = 0
+        buffer = 0
+        buffer_bits = 0
+        if bit_offset:
+            self.stream.seek(bit_offset // 8, io.SEEK_CUR)
+            buffer_bits = 8 - bit_offset % 8
+            buffer = read_int8(self.stream) & ((1 << buffer_bits) - 1)
+            remaining_bytes -= bit_offset // 8 + 1
+            remaining_bits -= bit_offset
+        output: List[int] = []
+        while remaining_bits > 0 and remaining_symbols > 0:
+            if buffer_bits < wanted_bits and (position < len(chunk) or remaining_bytes):
+                if position >= len(chunk):
+                    if output:
+                        yield bytes(output)
+                        output = []
+                    chunk = self.stream.read(min(DECODE_CHUNK_SIZE, remaining_bytes))
+                    if not chunk:
+                        raise ValueError("Unexpected end of encoded message.")
+                    remaining_bytes -= len(chunk)
+                    position = 0
+                refill = chunk[position:position + 8]
+                position += len(refill)
+                buffer = ((buffer & ((1 << buffer_bits) - 1)) << (8 * len(refill))) | int.from_bytes(refill, "big")
+                buffer_bits += 8 * len(refill)
+                continue
+            if buffer_bits >= table_bits:
+                entry = table[(buffer >> (buffer_bits - table_bits)) & table_mask]
+            else:
+                entry = table[(buffer << (table_bits - buffer_bits)) & table_mask]
+            if entry is not None and entry[1] <= buffer_bits:
+                character, length = entry
+            else:
+                character, length = self.read_long_code(buffer, buffer_bits)
+            output.append(character)
+            buffer_bits -= length
+            remaining_bits -= length
+            remaining_symbols -= 1
+        if output:
+            yield bytes(output)
+    def read_long_code(self, buffer: int, buffer_bits: int) -> tuple[int, int]:
+        for length in range(self.table_bits + 1, min(self.max_code_length, buffer_bits) + 1):
+            code = (buffer >> (buffer_bits - length)) & ((1 << length) - 1)
+            character = self.long_codes.get((length, code))
+            if character is not None:
+                return character, length
+        raise ValueError("Invalid encoded message.")
+
+class AdaptiveHuffmanTree:
+    # FGK adaptive Huffman tree. `order` lists the nodes by decreasing node
+    # number (the root first), which keeps the weights non-increasing, so the
+    # highest numbered node of a weight is found by walking towards the root.
+    def __init__(self):
+        self.root = Node.new_leaf(None, 0)
+        self.nyt = self.root
+        self.leaves: dict[int, Node] = {}
+        self.order: List[Node] = [self.root]
+        self.positions: dict[int, int] = {self.root.id: 0}
+    def code(self, node: Node) -> str:
+        bits = []
+        while node.parent is not None:
+            bits.append("1" if node.parent.children[1] is node else "0")
+            node = node.parent
+        return "".join(reversed(bits))
+    def update(self, character: int) -> None:
+        node = self.leaves.get(character)
+        if node is None:
+            node = self.add_character(character)
+        while node is not None:
+            leader = self.block_leader(node)
+            if leader is not node and leader is not node.parent:
+                self.swap(node, leader)
+            node.weight += 1
+            node = node.parent
+    def add_character(self, character: int) -> Node:
+        parent = self.nyt
+        leaf = Node.new_leaf(character, 0)
+        nyt = Node.new_leaf(None, 0)
+        parent.children = [nyt, leaf]
+        leaf.parent = parent
+        nyt.parent = parent
+        for node in (leaf, nyt):
+            self.positions[node.id] = len(self.order)
+            self.order.append(node)
+        self.nyt = nyt
+        self.leaves[character] = leaf
+        return leaf
+    def block_leader(self, node: Node) -> Node:
+        position = self.positions[node.id]
+        while position > 0 and self.order[position - 1].weight == node.weight:
+            position -= 1
+        return self.order[position]
+    def swap(self, first: Node, second: Node) -> None:
+        first_parent = first.parent
+        second_parent = second.parent
+        first_index = 0 if first_parent.children[0] is first else 1
+        second_index = 0 if second_parent.children[0] is second else 1
+        first_parent.children[first_index] = second
+        second_parent.children[second_index] = first
+        first.parent = second_parent
+        second.parent = first_parent
+        first_position = self.positions[first.id]
+        second_position = self.positions[second.id]
+        self.order[first_position] = second
+        self.order[second_position] = first
+        self.positions[first.id] = second_position
+        self.positions[second.id] = first_position
+
+class AdaptiveHuffmanEncoder:
+    def __init__(self, stream: io.BufferedWriter):
+        self.tree = AdaptiveHuffmanTree()
+        self.stream = stream
+        self.pending_bits = ""
+        write_int32(self.stream, FILE_FORMAT_CONSTANT)
+        write_int8(self.stream, FILE_FORMAT_VERSION_ADAPTIVE)
+    def write_chunk(self, chunk: bytes) -> None:
+        tree = self.tree
+        parts = [self.pending_bits]
+        for character in chunk:
+            node = tree.leaves.get(character)
+            if node is None:
+                parts.append(tree.code(tree.nyt))
+                parts.append(format(character, "09b"))
+            else:
+                parts.append(tree.code(node))
+            tree.update(character)
+        self.write_bits("".join(parts))
+    def write_bits(self, bits: str) -> None:
+        whole_bits = len(bits) - len(bits) % 8
+        if whole_bits:
+            self.stream.write(int(bits[:whole_bits], 2).to_bytes(whole_bits // 8, "big"))
+        self.pending_bits = bits[whole_bits:]
+    def close(self):
+        bits = self.pending_bits + self.tree.code(self.tree.nyt) + format(ADAPTIVE_END_OF_MESSAGE, "09b")
+        self.write_bits(bits + "0" * (-len(bits) % 8))
+        self.stream.flush()
+
+class AdaptiveHuffmanDecoder:
+    def __init__(self, stream: io.BufferedReader):
+        self.tree = AdaptiveHuffmanTree()
+        self.stream = stream
+    def read_bits(self) -> Generator[int]:
+        for chunk in iter(lambda: self.stream.read1(DECODE_CHUNK_SIZE), b""):
+            yield from map(int, format(int.from_bytes(chunk, "big"), f"0{8 * len(chunk)}b"))
+    def read(self) -> Generator[bytes]:
+        tree = self.tree
+        bits = self.read_bits()
+        output: List[int] = []
+        try:
+            while True:
+                node = tree.root
+                while node.children:
+                    node = node.children[next(bits)]
+                if node is tree.nyt:
+                    character = 0
+                    for _ in range(9):
+                        character = (character << 1) | next(bits)
+                    if character == ADAPTIVE_END_OF_MESSAGE:
+                        break
+                else:
+                    character = node.character
+                output.append(character)
+                tree.update(character)
+                if len(output) >= DECODE_CHUNK_SIZE:
+                    yield bytes(output)
+                    output = []
+        except StopIteration:
+            raise ValueError("Unexpected end of encoded message.")
+        if output:
+            yield bytes(output)
+
 def assert_ascii_text(text):
     if not text.isascii():
-            raise ValueError("Input file must contain only ASCII characters. Unicode is not supported.")
-    
-def encode_streaming(input_path, output_path, chunk_size=8192):
-    frequency_counter = Counter()
-    with open(input_path, "r", encoding="ascii") as f:
-        for chunk in iter(lambda: f.read(chunk_size), ""):
-            if not chunk.isascii():
-                raise ValueError("Input must be ASCII only.")
-            frequency_counter.update(chunk)
-    tree = HuffmanTree.new(frequency_counter.most_common())
-    with open(output_path, "wb") as fout:
-        encoder = HuffmanEncoder(tree, fout)
-        with open(input_path, "r", encoding="ascii") as fin:
-            for chunk in iter(lambda: fin.read(chunk_size), ""):
-                for char in chunk:
-                    encoder.write(char)
+            raise ValueError("Input file must contain only ASCII characters. Use binary mode for other data.")
+
+def count_characters(chunk: bytes, counts: List[int]) -> None:
+    # Characters that are common in a sample of the chunk are counted with
+    # bytes.count and removed from the chunk, the rest is counted one by one.
+    remaining = bytes(chunk)
+    for character, _ in Counter(remaining[:COUNT_SAMPLE_SIZE]).most_common():
+        occurances = remaining.count(character)
+        if occurances * 32 < len(remaining):
+            break
+        counts[character] += occurances
+        remaining = remaining.translate(None, bytes((character,)))
+    for character, occurances in Counter(remaining).items():
+        counts[character] += occurances
+
+def frequency_list(counts: List[int]) -> List[tuple[int, int]]:
+    return sorted(((character, count) for character, count in enumerate(counts) if count), key=lambda item: -item[1])
+
+@contextmanager
+def mapped_file(path):
+    with open(path, "rb") as stream:
+        if os.fstat(stream.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+def open_input(path):
+    return nullcontext(sys.stdin.buffer) if path == "-" else open(path, "rb")
+
+def open_output(path):
+    return nullcontext(sys.stdout.buffer) if path == "-" else open(path, "wb")
+
+def encode_adaptive(input_path, output_path, chunk_size=DECODE_CHUNK_SIZE, binary=False):
+    with open_input(input_path) as fin, open_output(output_path) as fout:
+        encoder = AdaptiveHuffmanEncoder(fout)
+        for chunk in iter(lambda: fin.read1(chunk_size), b""):
+            if not binary:
+                assert_ascii_text(chunk)
+            encoder.write_chunk(chunk)
+            fout.flush()
         encoder.close()
 
+def encode_streaming(input_path, output_path, chunk_size=ENCODE_CHUNK_SIZE, jobs=1, block_size=None, binary=False, adaptive=False):
+    # Pipes can only be read and written once, so they are encoded adaptively.
+    if adaptive or input_path == "-" or output_path == "-":
+        encode_adaptive(input_path, output_path, binary=binary)
+        return
+    if jobs > 1 or block_size is not None:
+        encode_blocked(input_path, output_path, jobs, block_size or DEFAULT_BLOCK_SIZE, binary)
+        return
+    with mapped_file(input_path) as data:
+        counts = [0] * 256
+        for offset in range(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            if not binary:
+                assert_ascii_text(chunk)
+            count_characters(chunk, counts)
+        tree = HuffmanTree.new(frequency_list(counts))
+        with open(output_path, "wb") as fout:
+            encoder = HuffmanEncoder(tree, fout)
+            for offset in range(0, len(data), chunk_size):
+                encoder.write_chunk(data[offset:offset + chunk_size])
+            encoder.close()
+
 def assert_zhf_file_format(stream):
     file_format_constant = read_int32(stream)
     if file_format_constant != FILE_FORMAT_CONSTANT:
         raise ValueError("Invalid file format.")
     
-def assert_file_format_version(stream):
+def assert_file_format_version(stream) -> int:
     file_format_version = read_int8(stream)
-    if file_format_version != FILE_FORMAT_VERSION:
+    if file_format_version not in SUPPORTED_FILE_FORMAT_VERSIONS:
         raise ValueError("Invalid file format version.")
+    return file_format_version
 
-def read_frequencies(stream: io.BufferedReader) -> List[tuple[str, int]]:
+def read_frequencies(stream: io.BufferedReader) -> List[tuple[int, int]]:
     frequency_table_length = read_int32(stream)
     frequencies = []
     for _ in range(frequency_table_length):
-        character = chr(read_int8(stream))
+        character = read_int8(stream)
         occurances = read_int32(stream)
         frequencies.append((character, occurances))
     return frequencies
 
-def decode_streaming(input_path, output_path):
+def new_message_decoder(codes: dict[int, tuple[int, int]], stream: io.BufferedReader, decoder: str, table_bits: int):
+    if decoder == "table":
+        return HuffmanTableDecoder(codes, stream, table_bits)
+    if decoder == "bit":
+        return HuffmanDecoder(HuffmanTree.from_codes(codes), stream)
+    raise ValueError(f"Unknown decoder: {decoder}")
+
+def read_header(stream: io.BufferedReader) -> tuple[int, dict[int, tuple[int, int]]]:
+    assert_zhf_file_format(stream)
+    file_format_version = assert_file_format_version(stream)
+    if file_format_version == 1:
+        codes = HuffmanTree.new(read_frequencies(stream)).code_table()
+    elif file_format_version == FILE_FORMAT_VERSION_ADAPTIVE:
+        codes = {}
+    else:
+        codes = canonical_codes(read_code_lengths(stream))
+    return file_format_version, codes
+
+def decode_streaming(input_path, output_path, decoder="table", table_bits=DEFAULT_TABLE_BITS, jobs=1):
+    with open_input(input_path) as fin:
+        file_format_version, codes = read_header(fin)
+        if file_format_version == FILE_FORMAT_VERSION_BLOCKED:
+            if input_path == "-":
+                raise ValueError("Blocked files can not be decoded from a pipe.")
+            block_index = read_block_index(fin)
+            decode_blocked(input_path, output_path, codes, block_index, decoder, table_bits, jobs)
+            return
+        if file_format_version == FILE_FORMAT_VERSION_ADAPTIVE:
+            message_decoder = AdaptiveHuffmanDecoder(fin)
+        else:
+            message_decoder = new_message_decoder(codes, fin, decoder, table_bits)
+        with open_output(output_path) as fout:
+            for data in message_decoder.read():
+                fout.write(data)
+
+@contextmanager
+def worker_map(jobs: int):
+    if jobs <= 1:
+        yield map
+        return
+    with ProcessPoolExecutor(jobs) as executor:
+        yield executor.map
+
+def read_block(input_path, binary: bool, offset: int, length: int) -> bytes:
+    with open(input_path, "rb") as stream:
+        stream.seek(offset)
+        block = stream.read(length)
+    if not binary:
+        assert_ascii_text(block)
+    return block
+
+def count_block(input_path, binary: bool, offset: int, length: int) -> List[int]:
+    counts = [0] * 256
+    count_characters(read_block(input_path, binary, offset, length), counts)
+    return counts
+
+def encode_block(input_path, code_strings: dict[int, str], binary: bool, offset: int, length: int) -> bytes:
+    bits = "".join(map(code_strings.__getitem__, read_block(input_path, binary, offset, length)))
+    used_bits = len(bits) % 8
+    bits += "0" * (-len(bits) % 8)
+    data = int(bits, 2).to_bytes(len(bits) // 8, "big") if bits else b""
+    return len(data).to_bytes(4, "big") + used_bits.to_bytes(1, "big") + data
+
+def decode_block(input_path, codes: dict[int, tuple[int, int]], decoder: str, table_bits: int, offset: int, symbol_count: int) -> bytes:
+    with open(input_path, "rb") as stream:
+        stream.seek(offset)
+        data = b"".join(new_message_decoder(codes, stream, decoder, table_bits).read())
+    if len(data) != symbol_count:
+        raise ValueError("Invalid block.")
+    return data
+
+def read_block_index(stream: io.BufferedReader) -> List[tuple[int, int]]:
+    block_count = read_int32(stream)
+    block_index = []
+    for _ in range(block_count):
+        offset = read_int64(stream)
+        symbol_count = read_int32(stream)
+        block_index.append((offset, symbol_count))
+    return block_index
+
+def write_block_index(stream: io.BufferedWriter, block_index: List[tuple[int, int]]) -> None:
+    # Offsets are int64, encoded files larger than 4 GiB are expected.
+    for offset, symbol_count in block_index:
+        write_int64(stream, offset)
+        write_int32(stream, symbol_count)
+
+def encode_blocked(input_path, output_path, jobs=1, block_size=DEFAULT_BLOCK_SIZE, binary=False):
+    if not 0 < block_size < 1 << 32:
+        raise ValueError("The block size has to be between 1 byte and 4 GiB, symbol counts are int32.")
+    input_size = os.path.getsize(input_path)
+    offsets = list(range(0, input_size, block_size))
+    lengths = [min(block_size, input_size - offset) for offset in offsets]
+    with worker_map(jobs) as map_blocks:
+        counts = [0] * 256
+        for block_counts in map_blocks(partial(count_block, input_path, binary), offsets, lengths):
+            counts = [count + block_count for count, block_count in zip(counts, block_counts)]
+        code_lengths = HuffmanTree.new(frequency_list(counts)).code_lengths()
+        code_strings = canonical_code_strings(code_lengths)
+        with open(output_path, "wb") as fout:
+            write_int32(fout, FILE_FORMAT_CONSTANT)
+            write_int8(fout, FILE_FORMAT_VERSION_BLOCKED)
+            write_code_lengths(fout, code_lengths)
+            write_int32(fout, len(offsets))
+            block_index_position = fout.tell()
+            fout.write(bytes(12 * len(offsets)))
+            block_offsets = []
+            for block in map_blocks(partial(encode_block, input_path, code_strings, binary), offsets, lengths):
+                block_offsets.append(fout.tell())
+                fout.write(block)
+            fout.seek(block_index_position)
+            write_block_index(fout, list(zip(block_offsets, lengths)))
+
+def decode_blocked(input_path, output_path, codes, block_index, decoder="table", table_bits=DEFAULT_TABLE_BITS, jobs=1):
+    offsets = [offset for offset, _ in block_index]
+    symbol_counts = [symbol_count for _, symbol_count in block_index]
+    with worker_map(jobs) as map_blocks, open_output(output_path) as fout:
+        for data in map_blocks(partial(decode_block, input_path, codes, decoder, table_bits), offsets, symbol_counts):
+            fout.write(data)
+
+def seek_index_path(input_path) -> str:
+    return f"{input_path}.zhi"
+
+def build_seek_index(input_path, interval=DEFAULT_SEEK_INTERVAL) -> List[int]:
+    with open(input_path, "rb") as fin:
+        file_format_version, codes = read_header(fin)
+        if file_format_version == FILE_FORMAT_VERSION_BLOCKED:
+            raise ValueError("Blocked files are indexed by their block index.")
+        if file_format_version == FILE_FORMAT_VERSION_ADAPTIVE:
+            raise ValueError("Adaptive files can not be indexed.")
+        code_lengths = [0] * 256
+        for character, (_, length) in codes.items():
+            code_lengths[character] = length
+        bit_offsets = []
+        bit_offset = 0
+        pending = 0
+        for data in HuffmanTableDecoder(codes, fin).read():
+            position = 0
+            while position < len(data):
+                if pending == 0:
+                    bit_offsets.append(bit_offset)
+                count = min(interval - pending, len(data) - position)
+                bit_offset += sum(map(code_lengths.__getitem__, data[position:position + count]))
+                pending = (pending + count) % interval
+                position += count
+    return bit_offsets
+
+def encoded_message_size(input_path) -> int:
+    with open(input_path, "rb") as fin:
+        read_header(fin)
+        return read_int32(fin)
+
+def file_stamp(input_path) -> tuple[int, int]:
+    stat = os.stat(input_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def write_seek_index(input_path, index_path=None, interval=DEFAULT_SEEK_INTERVAL) -> None:
+    bit_offsets = build_seek_index(input_path, interval)
+    size, mtime_ns = file_stamp(input_path)
+    with open(index_path or seek_index_path(input_path), "wb") as fout:
+        write_int32(fout, SEEK_INDEX_CONSTANT)
+        write_int8(fout, SEEK_INDEX_VERSION)
+        write_int32(fout, encoded_message_size(input_path))
+        write_int64(fout, size)
+        write_int64(fout, mtime_ns)
+        write_int32(fout, interval)
+        write_int32(fout, len(bit_offsets))
+        for bit_offset in bit_offsets:
+            write_int64(fout, bit_offset)
+
+def read_seek_index(input_path, index_path=None) -> tuple[int, List[int]]:
+    with open(index_path or seek_index_path(input_path), "rb") as stream:
+        if read_int32(stream) != SEEK_INDEX_CONSTANT or read_int8(stream) != SEEK_INDEX_VERSION:
+            raise ValueError("Invalid seek index.")
+        message_size = read_int32(stream)
+        stamp = (read_int64(stream), read_int64(stream))
+        # A file re-encoded from other content can have the same message
+        # size, but writing it changes its modification time. Both checks
+        # are O(1), the file is not read.
+        if message_size != encoded_message_size(input_path) or stamp != file_stamp(input_path):
+            raise ValueError("Seek index does not match the encoded file.")
+        interval = read_int32(stream)
+        bit_offsets = [read_int64(stream) for _ in range(read_int32(stream))]
+    return interval, bit_offsets
+
+def read_range(input_path, start: int, length: int, index_path=None) -> bytes:
+    if length <= 0:
+        return b""
+    end = start + length
     with open(input_path, "rb") as fin:
-        assert_zhf_file_format(fin)
-        assert_file_format_version(fin)
-        frequencies = read_frequencies(fin)
-        tree = HuffmanTree.new(frequencies)
-        decoder = HuffmanDecoder(tree, fin)
-        with open(output_path, "w", encoding="ascii") as fout:
-            for char in decoder.read():
-                fout.write(char)
+        file_format_version, codes = read_header(fin)
+        if file_format_version == FILE_FORMAT_VERSION_BLOCKED:
+            output = []
+            block_start = 0
+            for offset, symbol_count in read_block_index(fin):
+                block_end = block_start + symbol_count
+                if block_start < end and start < block_end:
+                    fin.seek(offset)
+                    data = b"".join(HuffmanTableDecoder(codes, fin).read(symbol_count=min(block_end, end) - block_start))
+                    output.append(data[max(start - block_start, 0):])
+                block_start = block_end
+            return b"".join(output)
+        if file_format_version == FILE_FORMAT_VERSION_ADAPTIVE:
+            # The adaptive tree depends on everything before `start`.
+            data = bytearray()
+            for block in AdaptiveHuffmanDecoder(fin).read():
+                data += block
+                if len(data) >= end:
+                    break
+            return bytes(data[start:end])
+        first_character = 0
+        bit_offset = 0
+        if os.path.exists(index_path or seek_index_path(input_path)):
+            interval, bit_offsets = read_seek_index(input_path, index_path)
+            if bit_offsets:
+                entry = min(start // interval, len(bit_offsets) - 1)
+                first_character = entry * interval
+                bit_offset = bit_offsets[entry]
+        data = b"".join(HuffmanTableDecoder(codes, fin).read(bit_offset, end - first_character))
+        return data[start - first_character:]
+
+def benchmark_tree_construction(alphabet_sizes=(256, 1024, 4096, 16384, 65536), repeat=3, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for alphabet_size in alphabet_sizes:
+        frequencies = [(symbol, rng.randint(1, 1_000_000)) for symbol in range(alphabet_size)]
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            HuffmanTree.new(frequencies)
+            best = min(best, time.perf_counter() - start)
+        results.append((alphabet_size, best))
+    return results
+
+def parse_size(text: str) -> int:
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().removesuffix("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def corpus_chunks(kind: str, seed=0, alphabet_size=256, skew=0.9) -> Generator[bytes]:
+    rng = random.Random(seed)
+    if kind == "text":
+        # Words follow Zipf's law, like natural language.
+        letters = "etaoinshrdlcumwfgypbvkjxqz"
+        vocabulary = ["".join(rng.choices(letters, k=rng.randint(1, 10))) for _ in range(5000)] + [".\n", ","]
+        weights = [1 / rank for rank in range(1, len(vocabulary) - 1)] + [0.05, 0.05]
+        while True:
+            yield " ".join(rng.choices(vocabulary, weights, k=BENCHMARK_CHUNK_SIZE // 5)).encode("ascii")
+    elif kind == "logs":
+        levels = ["INFO"] * 90 + ["WARN"] * 7 + ["ERROR"] * 3
+        services = ["auth", "billing", "search", "gateway", "storage"]
+        resources = ["users", "orders", "items", "sessions", "invoices"]
+        lines = []
+        while True:
+            for _ in range(BENCHMARK_CHUNK_SIZE // 120):
+                lines.append(
+                    f"2026-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}Z "
+                    f"{rng.choice(levels)} [{rng.choice(services)}] GET /api/v1/{rng.choice(resources)}/{rng.randint(1, 99999)} "
+                    f"status={rng.choice((200, 200, 200, 201, 404, 500))} latency_ms={int(rng.expovariate(1 / 40))} "
+                    f"ip=10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}\n")
+            yield "".join(lines).encode("ascii")
+            lines = []
+    elif kind == "skewed":
+        # Byte i has probability proportional to skew ** i.
+        weights = [skew ** i for i in range(alphabet_size)]
+        while True:
+            yield bytes(rng.choices(range(alphabet_size), weights, k=BENCHMARK_CHUNK_SIZE))
+    elif kind == "uniform":
+        while True:
+            yield bytes(rng.choices(range(alphabet_size), k=BENCHMARK_CHUNK_SIZE))
+    else:
+        raise ValueError(f"Unknown corpus: {kind}")
+
+def generate_corpus(path, kind: str, size: int, seed=0, alphabet_size=256, skew=0.9) -> None:
+    with open(path, "wb") as fout:
+        written = 0
+        for chunk in corpus_chunks(kind, seed, alphabet_size, skew):
+            if written >= size:
+                break
+            chunk = chunk[:size - written]
+            fout.write(chunk)
+            written += len(chunk)
+
+def file_entropy(path) -> float:
+    counts = [0] * 256
+    with mapped_file(path) as data:
+        for offset in range(0, len(data), BENCHMARK_CHUNK_SIZE):
+            count_characters(data[offset:offset + BENCHMARK_CHUNK_SIZE], counts)
+    total = sum(counts)
+    return -sum(count / total * math.log2(count / total) for count in counts if count)
+
+def files_equal(first_path, second_path) -> bool:
+    if os.path.getsize(first_path) != os.path.getsize(second_path):
+        return False
+    with open(first_path, "rb") as first, open(second_path, "rb") as second:
+        for chunk in iter(lambda: first.read(BENCHMARK_CHUNK_SIZE), b""):
+            if chunk != second.read(len(chunk)):
+                return False
+    return True
+
+def measured_call(function, *args, **kwargs) -> tuple[float, int | None]:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    try:
+        import resource
+    except ImportError:
+        return elapsed, None
+    # ru_maxrss is in kilobytes on Linux, worker processes count as children.
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return elapsed, peak_rss
+
+def run_measured(function, *args, **kwargs) -> tuple[float, int | None]:
+    # A fresh process per run, so the peak RSS belongs to this run only.
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(measured_call, function, *args, **kwargs).result()
+
+def benchmark_compression(sizes=("1M",), corpora=BENCHMARK_CORPORA, modes=("static",), jobs=1, seed=0, workdir=None) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        for kind in corpora:
+            for size_text in sizes:
+                size = parse_size(size_text)
+                input_path = os.path.join(directory, f"{kind}.bin")
+                encoded_path = os.path.join(directory, f"{kind}.zhf")
+                decoded_path = os.path.join(directory, f"{kind}_decoded.bin")
+                generate_corpus(input_path, kind, size, seed)
+                entropy = file_entropy(input_path)
+                for mode in modes:
+                    encode_options = {"binary": True, "adaptive": mode == "adaptive"}
+                    if mode == "blocked":
+                        encode_options.update(jobs=jobs, block_size=DEFAULT_BLOCK_SIZE)
+                    encode_seconds, encode_peak_rss = run_measured(encode_streaming, input_path, encoded_path, **encode_options)
+                    decode_seconds, decode_peak_rss = run_measured(decode_streaming, encoded_path, decoded_path, jobs=jobs)
+                    encoded_size = os.path.getsize(encoded_path)
+                    megabytes = size / (1 << 20)
+                    results.append({
+                        "corpus": kind,
+                        "size_bytes": size,
+                        "entropy_bits_per_byte": round(entropy, 4),
+                        "mode": mode,
+                        "jobs": jobs,
+                        "encoded_size_bytes": encoded_size,
+                        "compression_ratio": round(size / encoded_size, 4) if encoded_size else None,
+                        "bits_per_byte": round(8 * encoded_size / size, 4) if size else None,
+                        "encode_seconds": round(encode_seconds, 4),
+                        "decode_seconds": round(decode_seconds, 4),
+                        "encode_mb_per_second": round(megabytes / encode_seconds, 3),
+                        "decode_mb_per_second": round(megabytes / decode_seconds, 3),
+                        "encode_peak_rss_kb": encode_peak_rss,
+                        "decode_peak_rss_kb": decode_peak_rss,
+                        "round_trip_ok": files_equal(input_path, decoded_path),
+                    })
+                for path in (input_path, encoded_path, decoded_path):
+                    os.remove(path)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "results": results,
+    }
 
 def main():
     parser = argparse.ArgumentParser(description="Huffman Encoder/Decoder CLI")
     subparsers = parser.add_subparsers(dest="command", required=True)
     encode_parser = subparsers.add_parser("encode", help="Encode a text file into Huffman format (.zhf)")
-    encode_parser.add_argument("--input", "-i", required=True, help="Input .txt file")
-    encode_parser.add_argument("--output", "-o", required=True, help="Output .zhf file")
+    encode_parser.add_argument("--input", "-i", required=True, help="Input .txt file, or - for stdin")
+    encode_parser.add_argument("--output", "-o", required=True, help="Output .zhf file, or - for stdout")
+    encode_parser.add_argument("--jobs", "-j", type=int, default=1, help="Encode independent blocks on N processes")
+    encode_parser.add_argument("--block-size", type=int, default=None, help="Characters per block, implies the blocked format")
+    encode_parser.add_argument("--binary", action="store_true", help="Accept any bytes instead of only ASCII text")
+    encode_parser.add_argument("--adaptive", action="store_true", help="Encode in a single pass, implied when reading or writing a pipe")
     decode_parser = subparsers.add_parser("decode", help="Decode a Huffman (.zhf) file into a .txt file")
-    decode_parser.add_argument("--input", "-i", required=True, help="Input .zhf file")
-    decode_parser.add_argument("--output", "-o", required=True, help="Output .txt file")
+    decode_parser.add_argument("--input", "-i", required=True, help="Input .zhf file, or - for stdin")
+    decode_parser.add_argument("--output", "-o", required=True, help="Output .txt file, or - for stdout")
+    decode_parser.add_argument("--decoder", choices=["table", "bit"], default="table", help="Decode with lookup tables or bit by bit")
+    decode_parser.add_argument("--table-bits", type=int, default=DEFAULT_TABLE_BITS, help="Bits per table lookup")
+    decode_parser.add_argument("--jobs", "-j", type=int, default=1, help="Decode blocks of a blocked file on N processes")
+    index_parser = subparsers.add_parser("index", help="Write a seek index next to a .zhf file for read_range")
+    index_parser.add_argument("--input", "-i", required=True, help="Input .zhf file")
+    index_parser.add_argument("--interval", type=int, default=DEFAULT_SEEK_INTERVAL, help="Characters between index entries")
+    subparsers.add_parser("benchmark-tree", help="Time Huffman tree construction for alphabets of 256 to 65536 symbols")
+    benchmark_parser = subparsers.add_parser("benchmark", help="Measure throughput, peak RSS and compression ratio, written as JSON")
+    benchmark_parser.add_argument("--sizes", default="1M", help="Comma separated corpus sizes, e.g. 1M,100M,1G")
+    benchmark_parser.add_argument("--corpora", default=",".join(BENCHMARK_CORPORA), help=f"Comma separated corpora out of {', '.join(BENCHMARK_CORPORA)}")
+    benchmark_parser.add_argument("--modes", default="static", help=f"Comma separated modes out of {', '.join(BENCHMARK_MODES)}")
+    benchmark_parser.add_argument("--jobs", "-j", type=int, default=1, help="Processes for the blocked mode")
+    benchmark_parser.add_argument("--seed", type=int, default=0, help="Seed for the generated corpora")
+    benchmark_parser.add_argument("--workdir", default=None, help="Directory for the generated files")
+    benchmark_parser.add_argument("--output", "-o", default="-", help="Output .json file, or - for stdout")
     args = parser.parse_args()
-    if args.command == "encode":
-        encode_streaming(args.input, args.output)
+    if args.command == "benchmark":
+        report = benchmark_compression(args.sizes.split(","), args.corpora.split(","), args.modes.split(","), args.jobs, args.seed, args.workdir)
+        if args.output == "-":
+            print(json.dumps(report, indent=2))
+        else:
+            pathlib.Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    elif args.command == "benchmark-tree":
+        for alphabet_size, seconds in benchmark_tree_construction():
+            print(f"{alphabet_size:>6} symbols: {seconds * 1000:8.2f} ms")
+    elif args.command == "index":
+        write_seek_index(args.input, interval=args.interval)
+    elif args.command == "encode":
+        encode_streaming(args.input, args.output, jobs=args.jobs, block_size=args.block_size, binary=args.binary, adaptive=args.adaptive)
     elif args.command == "decode":
-        decode_streaming(args.input, args.output)
+        decode_streaming(args.input, args.output, args.decoder, args.table_bits, args.jobs)
 
 if __name__ == "__main__":
     main()
@@ -253,4 +1031,135 @@ def test_hello_world():
 def test_lorem_ipsum():
     encode_streaming("lorem.txt", "lorem.zhf")
     decode_streaming("lorem.zhf", "lorem_decoded.txt")
-    assert pathlib.Path("lorem.txt").read_text() == pathlib.Path("lorem_decoded.txt").read_text()
\ No newline at end of file
+    assert pathlib.Path("lorem.txt").read_text() == pathlib.Path("lorem_decoded.txt").read_text()
+
+def test_single_character():
+    pathlib.Path("single_character.txt").write_text("aaaa")
+    encode_streaming("single_character.txt", "single_character.zhf")
+    for decoder in ["table", "bit"]:
+        decode_streaming("single_character.zhf", "single_character_decoded.txt", decoder=decoder)
+        assert pathlib.Path("single_character_decoded.txt").read_text() == "aaaa"
+    for path in ["single_character.txt", "single_character.zhf", "single_character_decoded.txt"]:
+        pathlib.Path(path).unlink()
+
+def test_decode_file_format_version_1():
+    for name in ["hello_world_v1", "dust_and_circuits"]:
+        with open(f"{name}.zhf", "rb") as stream:
+            assert_zhf_file_format(stream)
+            assert assert_file_format_version(stream) == 1
+    decode_streaming("hello_world_v1.zhf", "hello_world_decoded.txt")
+    assert pathlib.Path("hello_world.txt").read_text() == pathlib.Path("hello_world_decoded.txt").read_text()
+    decode_streaming("dust_and_circuits.zhf", "dust_and_circuits_decoded.txt")
+    assert pathlib.Path("dust_and_circuits.txt").read_text() == pathlib.Path("dust_and_circuits_decoded.txt").read_text()
+
+def test_blocked():
+    for jobs in [1, 2]:
+        encode_streaming("lorem.txt", "lorem_blocked.zhf", jobs=jobs, block_size=10000)
+        for decoder in ["table", "bit"]:
+            decode_streaming("lorem_blocked.zhf", "lorem_decoded.txt", decoder=decoder, jobs=jobs)
+            assert pathlib.Path("lorem.txt").read_text() == pathlib.Path("lorem_decoded.txt").read_text()
+    pathlib.Path("lorem_blocked.zhf").unlink()
+
+def test_block_index_offsets_over_4_gib():
+    block_index = [(17, 1 << 20), (5 << 30, 1 << 20), ((1 << 40) + 3, 12)]
+    stream = io.BytesIO()
+    write_int32(stream, len(block_index))
+    write_block_index(stream, block_index)
+    stream.seek(0)
+    assert read_block_index(stream) == block_index
+
+def test_binary():
+    data = bytes(range(256)) * 3 + "Grüße, 世界\n".encode("utf-8") * 100 + bytes(1000)
+    pathlib.Path("binary.bin").write_bytes(data)
+    try:
+        encode_streaming("binary.bin", "binary.zhf")
+        assert False, "Expected non-ASCII input to be rejected"
+    except ValueError:
+        pass
+    for block_size in [None, 500]:
+        encode_streaming("binary.bin", "binary.zhf", block_size=block_size, binary=True)
+        for decoder in ["table", "bit"]:
+            decode_streaming("binary.zhf", "binary_decoded.bin", decoder=decoder)
+            assert pathlib.Path("binary_decoded.bin").read_bytes() == data
+    for path in ["binary.bin", "binary.zhf", "binary_decoded.bin"]:
+        pathlib.Path(path).unlink()
+
+def test_empty_file():
+    pathlib.Path("empty.txt").write_bytes(b"")
+    encode_streaming("empty.txt", "empty.zhf")
+    decode_streaming("empty.zhf", "empty_decoded.txt")
+    assert pathlib.Path("empty_decoded.txt").read_bytes() == b""
+    for path in ["empty.txt", "empty.zhf", "empty_decoded.txt"]:
+        pathlib.Path(path).unlink()
+
+def test_read_range():
+    text = pathlib.Path("lorem.txt").read_bytes()
+    encode_streaming("lorem.txt", "lorem_range.zhf")
+    encode_streaming("lorem.txt", "lorem_range_blocked.zhf", block_size=10000)
+    ranges = [(0, 10), (12345, 1000), (65530, 20), (len(text) - 5, 100), (len(text) + 10, 5)]
+    for start, length in ranges:
+        assert read_range("lorem_range.zhf", start, length) == text[start:start + length]
+        assert read_range("lorem_range_blocked.zhf", start, length) == text[start:start + length]
+    write_seek_index("lorem_range.zhf", interval=1000)
+    for start, length in ranges:
+        assert read_range("lorem_range.zhf", start, length) == text[start:start + length]
+    # Same symbol frequencies, so the same message size, but other content.
+    lines = text.split(b"\n")
+    random.Random(0).shuffle(lines)
+    pathlib.Path("lorem_range_shuffled.txt").write_bytes(b"\n".join(lines))
+    encode_streaming("lorem_range_shuffled.txt", "lorem_range.zhf")
+    # Some file systems keep coarse timestamps, make sure the rewrite is later.
+    stat = os.stat("lorem_range.zhf")
+    os.utime("lorem_range.zhf", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    try:
+        read_range("lorem_range.zhf", 50000, 10)
+        assert False, "stale seek index was accepted"
+    except ValueError:
+        pass
+    for path in ["lorem_range.zhf", "lorem_range.zhf.zhi", "lorem_range_blocked.zhf", "lorem_range_shuffled.txt"]:
+        pathlib.Path(path).unlink()
+
+def test_adaptive():
+    data = pathlib.Path("lorem.txt").read_bytes()[:20000] + bytes(range(256)) * 4
+    pathlib.Path("adaptive.bin").write_bytes(data)
+    encode_streaming("adaptive.bin", "adaptive.zhf", binary=True, adaptive=True)
+    decode_streaming("adaptive.zhf", "adaptive_decoded.bin")
+    assert pathlib.Path("adaptive_decoded.bin").read_bytes() == data
+    assert read_range("adaptive.zhf", 1000, 50) == data[1000:1050]
+    for path in ["adaptive.bin", "adaptive.zhf", "adaptive_decoded.bin"]:
+        pathlib.Path(path).unlink()
+
+def test_adaptive_pipe():
+    import subprocess
+    text = pathlib.Path("hello_world.txt").read_bytes()
+    encoded = subprocess.run([sys.executable, "huffman.py", "encode", "-i", "-", "-o", "-"], input=text, capture_output=True, check=True).stdout
+    decoded = subprocess.run([sys.executable, "huffman.py", "decode", "-i", "-", "-o", "-"], input=encoded, capture_output=True, check=True).stdout
+    assert decoded == text
+
+def test_blocked_to_stdout():
+    import subprocess
+    text = pathlib.Path("lorem.txt").read_bytes()
+    encode_streaming("lorem.txt", "lorem_pipe_blocked.zhf", block_size=10000)
+    decoded = subprocess.run([sys.executable, "huffman.py", "decode", "-i", "lorem_pipe_blocked.zhf", "-o", "-", "--jobs", "2"], capture_output=True, check=True).stdout
+    pathlib.Path("lorem_pipe_blocked.zhf").unlink()
+    assert decoded == text
+    assert not os.path.exists("-")
+
+def test_benchmark_compression():
+    report = benchmark_compression(sizes=["20K"], corpora=["logs", "skewed"], modes=BENCHMARK_MODES, workdir=".")
+    assert len(report["results"]) == 6
+    for result in report["results"]:
+        assert result["round_trip_ok"]
+        assert result["compression_ratio"] > 1
+
+def test_tree_tie_breaking():
+    tree = HuffmanTree.new([("a", 1), ("b", 1), ("c", 1), ("d", 1)])
+    assert tree.code_table() == {"a": (3, 2), "b": (2, 2), "c": (1, 2), "d": (0, 2)}
+
+def test_table_decoder_matches_bit_decoder():
+    for name in ["hello_world", "lorem", "dust_and_circuits"]:
+        decode_streaming(f"{name}.zhf", f"{name}_decoded.txt", decoder="bit")
+        expected = pathlib.Path(f"{name}_decoded.txt").read_bytes()
+        for table_bits in [1, 4, 8, 12]:
+            decode_streaming(f"{name}.zhf", f"{name}_decoded.txt", decoder="table", table_bits=table_bits)
+            assert pathlib.Path(f"{name}_decoded.txt").read_bytes() == expected
@@ -1,22 +1,79 @@
+from array import array
+from typing import Iterable
+import numbers
+
+MAX_ROMAN = 3999
+
+# Every decimal digit has its own symbols, so a numeral is the concatenation of
+# the encodings of its thousands, hundreds, tens and units.
+THOUSANDS = ("", "M", "MM", "MMM")
+HUNDREDS = ("", "C", "CC", "CCC", "CD", "D", "DC", "DCC", "DCCC", "CM")
+TENS = ("", "X", "XX", "XXX", "XL", "L", "LX", "LXX", "LXXX", "XC")
+UNITS = ("", "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX")
+
+# All 3999 numerals and their values, built once so conversions are lookups.
+ROMAN = {num: THOUSANDS[num // 1000] + HUNDREDS[num // 100 % 10] + TENS[num // 10 % 10] + UNITS[num % 10] for num in range(1, MAX_ROMAN + 1)}
+ROMAN_VALUES = {numeral: num for num, numeral in ROMAN.items()}
+
+def check_integer(num):
+    # 4.0 and True hash like 4 and 1, so the lookup alone would take them.
+    if isinstance(num, bool) or not isinstance(num, numbers.Integral):
+        raise ValueError(f"{num!r} is not an integer from 1 to {MAX_ROMAN}")
+    return num
+
+def int_to_roman(num: int) -> str:
+    try:
+        return ROMAN[check_integer(num)]
+    except KeyError:
+        raise ValueError(f"{num!r} is not an integer from 1 to {MAX_ROMAN}") from None
+
+def roman_to_int(numeral: str) -> int:
+    try:
+        return ROMAN_VALUES[numeral]
+    except KeyError:
+        raise ValueError(f"{numeral!r} is not a Roman numeral") from None
+
+def ints_to_roman(nums: Iterable[int]) -> list[str]:
+    # Also accepts array.array and other buffers of integers.
+    try:
+        return list(map(ROMAN.__getitem__, map(check_integer, nums)))
+    except KeyError as error:
+        raise ValueError(f"{error.args[0]!r} is not an integer from 1 to {MAX_ROMAN}") from None
+
+def roman_to_ints(numerals: Iterable[str]) -> array:
+    try:
+        return array('H', map(ROMAN_VALUES.__getitem__, numerals))
+    except KeyError as error:
+        raise ValueError(f"{error.args[0]!r} is not a Roman numeral") from None
+
 class Solution:
     def intToRoman(self, num: int) -> str:
-        c_tbl = {
-            'I': 1,
-            'V': 5,
-            'X': 10,
-            'L': 50,
-            'C': 100,
-            'D': 500,
-            'M': 1000
-        }
-        keys = list(c_tbl.keys())
-        remainder = num
-        result = ""
-        while remainder > 0:
-            max_idx = len(c_tbl) - 1
-            while max_idx > 0 and c_tbl[keys[max_idx]] <= remainder:
-                max_idx -= 1
-            result += keys[max_idx]
-            remainder -= c_tbl[keys[max_idx]]
-        return result
+        return int_to_roman(num)
+    def romanToInt(self, s: str) -> int:
+        return roman_to_int(s)
+
+def test_round_trip():
+    solution = Solution()
+    for num in range(1, MAX_ROMAN + 1):
+        assert solution.romanToInt(solution.intToRoman(num)) == num
+    assert [solution.intToRoman(num) for num in (4, 9, 14, 40, 90, 400, 900, 1994, 3999)] == ["IV", "IX", "XIV", "XL", "XC", "CD", "CM", "MCMXCIV", "MMMCMXCIX"]
+    assert roman_to_ints(ints_to_roman(array('H', range(1, MAX_ROMAN + 1)))).tolist() == list(range(1, MAX_ROMAN + 1))
 
+def test_out_of_range():
+    for num in (0, -1, MAX_ROMAN + 1, 4.0, True, "4", None):
+        try:
+            int_to_roman(num)
+            assert False, f"{num!r} was accepted"
+        except ValueError:
+            pass
+    for numeral in ("", "IIII", "VX", "iv", "MMMM"):
+        try:
+            roman_to_int(numeral)
+            assert False, f"{numeral!r} was accepted"
+        except ValueError:
+            pass
+    try:
+        ints_to_roman([1, 2.0])
+        assert False, "2.0 was accepted"
+    except ValueError:
+        pass
@@ -1,28 +1,123 @@
-from typing import List
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List
 
+# Neighbour lcp values per block of the range minimum structure.
+LCP_BLOCK_SIZE = 64
 
-def all_equal(items):
-    if len(items) <= 1:
-        return True
-    for i in range(1, len(items)):
-        if items[i] != items[i-1]:
-            return False
-    return True
+def common_prefix_length(a: str, b: str) -> int:
+    # Binary search on the length, each step compares a slice in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if b.startswith(a[lo:mid], lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
 
-def get_chars(items, index):
-    return [str[index] for str in items]
+def longest_common_prefix(strs: Iterable[str]) -> str:
+    # Whatever the lexicographic min and max share, every string in between
+    # shares as well, so only those two are compared.
+    strs = list(strs)
+    if not strs:
+        return ""
+    first, last = min(strs), max(strs)
+    return first[:common_prefix_length(first, last)]
+
+def prefix_successor(prefix: str) -> str | None:
+    # The smallest string after every string that starts with prefix, None
+    # when there is no such string.
+    while prefix and prefix[-1] == chr(0x10FFFF):
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+class PrefixIndex:
+    # The distinct keys in sorted order, with the common prefix length of every
+    # pair of neighbours (lcp[i] is shared by keys[i - 1] and keys[i]). The
+    # keys with a prefix are a range found by binary search. The common prefix
+    # of any group of keys is the minimum of lcp between its first and last
+    # key. That minimum comes from the lcp values at both ends and a sparse
+    # table over the minima of whole blocks in between, built on the first
+    # group query.
+    def __init__(self, keys: Iterable[str]):
+        self.keys = sorted(set(keys))
+        self.rank = {key: idx for idx, key in enumerate(self.keys)}
+        self.lcp = array("i", [0])
+        self.lcp.extend(common_prefix_length(self.keys[idx - 1], self.keys[idx]) for idx in range(1, len(self.keys)))
+        self.minima = None
+
+    def prefix_range(self, prefix: str) -> range:
+        start = bisect_left(self.keys, prefix)
+        successor = prefix_successor(prefix)
+        stop = len(self.keys) if successor is None else bisect_left(self.keys, successor, start)
+        return range(start, stop)
+
+    def keys_with_prefix(self, prefix: str) -> List[str]:
+        found = self.prefix_range(prefix)
+        return self.keys[found.start:found.stop]
+
+    def count_with_prefix(self, prefix: str) -> int:
+        return len(self.prefix_range(prefix))
+
+    def range_min(self, start: int, stop: int) -> int:
+        # Minimum of lcp[start:stop].
+        lcp = self.lcp
+        if self.minima is None:
+            # minima[level][block] is the minimum of 2^level blocks from block.
+            self.minima = [array("i", (min(lcp[idx:idx + LCP_BLOCK_SIZE]) for idx in range(0, len(lcp), LCP_BLOCK_SIZE)))]
+            span = 1
+            while 2 * span <= len(self.minima[0]):
+                previous = self.minima[-1]
+                self.minima.append(array("i", map(min, previous[:len(previous) - span], previous[span:])))
+                span *= 2
+        first_block = -(-start // LCP_BLOCK_SIZE)
+        last_block = stop // LCP_BLOCK_SIZE
+        if first_block >= last_block:
+            return min(lcp[start:stop])
+        level = (last_block - first_block).bit_length() - 1
+        minima = self.minima[level]
+        ends = lcp[start:first_block * LCP_BLOCK_SIZE] + lcp[last_block * LCP_BLOCK_SIZE:stop]
+        return min(minima[first_block], minima[last_block - (1 << level)], *ends)
+
+    def group_prefix(self, group: Iterable[str]) -> str:
+        # Common prefix of keys of this index, without reading the keys again.
+        ranks = [self.rank[key] for key in group]
+        if not ranks:
+            return ""
+        first, last = min(ranks), max(ranks)
+        if first == last:
+            return self.keys[first]
+        return self.keys[first][:self.range_min(first + 1, last + 1)]
 
 class Solution:
     def longestCommonPrefix(self, strs: List[str]) -> str:
-        i = 0
-        min_length = min(len(str) for str in strs)
-        result = ""
-        if min_length == 0:
-            return ""
-        for i in range(min_length):
-            chars = get_chars(strs, i)
-            if all_equal(chars):
-                result = strs[0][0:i+1]
-            else:
-                break
-        return result
\ No newline at end of file
+        return longest_common_prefix(strs)
+
+def test_prefix_index():
+    import os
+    import random
+    rng = random.Random(0)
+    keys = ["".join(rng.choice("ab\U0010ffff") for _ in range(rng.randint(0, 8))) for _ in range(3000)]
+    index = PrefixIndex(keys)
+    assert len(index.keys) > 4 * LCP_BLOCK_SIZE
+    for _ in range(300):
+        prefix = "".join(rng.choice("ab\U0010ffff") for _ in range(rng.randint(0, 4)))
+        expected = sorted({key for key in keys if key.startswith(prefix)})
+        assert index.keys_with_prefix(prefix) == expected
+        assert index.count_with_prefix(prefix) == len(expected)
+    for size in (1, 2, 5, LCP_BLOCK_SIZE, 3 * LCP_BLOCK_SIZE, len(index.keys)):
+        for _ in range(20):
+            group = rng.sample(index.keys, size)
+            assert index.group_prefix(group) == os.path.commonprefix(group)
+    assert index.group_prefix([]) == ""
+
+def test_longest_common_prefix():
+    import os
+    assert Solution().longestCommonPrefix(["flower", "flow", "flight"]) == "fl"
+    assert longest_common_prefix([]) == ""
+    for strs in (["dog", "racecar", "car"], ["a"], ["", "b"], ["ab", "ab"]):
+        assert longest_common_prefix(strs) == os.path.commonprefix(strs)
+    assert prefix_successor("a\U0010ffff") == "b" and prefix_successor("\U0010ffff") is None
@@ -1,15 +1,122 @@
+from array import array
+from typing import Iterable, List
+
+# Manacher's algorithm runs over the string with a separator between (and
+# around) its characters, so even palindromes get a center too. Position i of
+# that text is character i // 2 for odd i and the gap before it for even i;
+# radii[i] is the length of the longest palindrome in s centered there.
+
+SEPARATOR = -1
+LEFT_END = -2
+RIGHT_END = -3
+
+class Manacher:
+    # The code point and radius buffers are kept between calls and only grow,
+    # so a batch of strings reuses the same memory.
+    def __init__(self):
+        self.text = []
+        self.radii = []
+
+    def compute(self, s: str) -> int:
+        # Fills the buffers for s and returns the length of the separated text.
+        size = 2 * len(s) + 1
+        if len(self.text) < size + 2:
+            self.text = [SEPARATOR] * (size + 2)
+            self.radii = [0] * (size + 2)
+        # text[1:size + 1] is the separated text, with a distinct value at both
+        # ends so the expansion stops without bounds checks.
+        text = self.text
+        text[0] = LEFT_END
+        text[1:size + 1:2] = [SEPARATOR] * (len(s) + 1)
+        text[2:size:2] = map(ord, s)
+        text[size + 1] = RIGHT_END
+        radii = self.radii
+        twice_center = right = 0
+        for i in range(1, size + 1):
+            if i < right:
+                # Unless the mirrored palindrome ends exactly at the right edge,
+                # its radius (cut at the edge) is final without expanding.
+                mirror = radii[twice_center - i]
+                reach = right - i
+                if mirror < reach:
+                    radii[i] = mirror
+                    continue
+                if mirror > reach:
+                    radii[i] = reach
+                    continue
+                radius = reach
+            else:
+                radius = 0
+            low = i - radius - 1
+            high = i + radius + 1
+            while text[high] == text[low]:
+                high += 1
+                low -= 1
+            radii[i] = high - i - 1
+            if high - 1 > right:
+                twice_center, right = 2 * i, high - 1
+        return size
+
+    def radius_array(self, s: str) -> array:
+        size = self.compute(s)
+        return array('i', self.radii[1:size + 1])
+
+    def longest(self, s: str) -> str:
+        size = self.compute(s)
+        radii = self.radii
+        length = max(radii[1:size + 1])
+        start = (radii.index(length, 1) - 1 - length) // 2
+        return s[start:start + length]
+
+def palindrome_radii(s: str) -> array:
+    return Manacher().radius_array(s)
+
+def longest_palindromes_ending_at(s: str, radii: array | None = None) -> array:
+    # Length of the longest palindrome that ends at every index of s. The
+    # palindrome centered at c (in the separated text) ending at e has length
+    # e - c, so the best center is the smallest c that reaches e, and that
+    # center only moves right as e grows.
+    if radii is None:
+        radii = palindrome_radii(s)
+    lengths = array('i', bytes(4 * len(s)))
+    center = 0
+    for end in range(2, len(radii), 2):
+        while center + radii[center] < end:
+            center += 1
+        lengths[end // 2 - 1] = end - center
+    return lengths
+
+def longest_palindromes_starting_at(s: str, radii: array | None = None) -> array:
+    if radii is None:
+        radii = palindrome_radii(s)
+    lengths = longest_palindromes_ending_at(s[::-1], radii[::-1])
+    lengths.reverse()
+    return lengths
+
+def longest_palindromes(strings: Iterable[str]) -> List[str]:
+    manacher = Manacher()
+    return [manacher.longest(s) for s in strings]
+
 class Solution:
     def longestPalindrome(self, s: str) -> str:
-        if len(s) == 1:
-            return s
-        max_n = 0
-        palindrome = ""
-        for start in range(0, len(s)):
-            for end in range(start + 1, len(s) + 1):
-                substr = s[start:end]
-                if substr == substr[::-1]:
-                    n = len(substr)
-                    if n > max_n:
-                        max_n = n
-                        palindrome = substr
-        return palindrome
\ No newline at end of file
+        return Manacher().longest(s)
+
+def test_palindrome_radii():
+    import random
+    rng = random.Random(0)
+    for _ in range(3000):
+        s = "".join(rng.choice(rng.choice(["a", "ab", "aab", "abc"])) for _ in range(rng.randint(0, 30)))
+        expected = []
+        for center in range(2 * len(s) + 1):
+            radius = center % 2
+            while center - radius - 1 >= 0 and center + radius + 1 <= 2 * len(s) and s[(center - radius - 2) // 2] == s[(center + radius) // 2]:
+                radius += 2
+            expected.append(radius)
+        assert list(palindrome_radii(s)) == expected, s
+        best = Solution().longestPalindrome(s)
+        assert best == best[::-1] and len(best) == max(expected) and best in s
+
+def test_long_runs():
+    assert Solution().longestPalindrome("a" * 100000) == "a" * 100000
+    assert Solution().longestPalindrome("ab" + "c" * 5 + "d" + "c" * 3 + "ba") == "c" * 3 + "d" + "c" * 3
+    assert list(palindrome_radii("aaab")) == [0, 1, 2, 3, 2, 1, 0, 1, 0]
@@ -1,13 +1,177 @@
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial, reduce
+from typing import Iterable, List
+import mmap
+import os
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+def majority_candidate(values: Iterable):
+    # Boyer-Moore voting: if a value occurs more than half of the time it is
+    # the candidate, in O(1) memory. Returns None for an empty input.
+    candidate = None
+    votes = 0
+    for value in values:
+        if votes == 0:
+            candidate = value
+            votes = 1
+        elif value == candidate:
+            votes += 1
+        else:
+            votes -= 1
+    return candidate
+
+def is_majority(candidate, values: Iterable) -> bool:
+    total = 0
+    count = 0
+    for value in values:
+        total += 1
+        count += value == candidate
+    return 2 * count > total
+
+def majority_element(values, verify: bool = True):
+    # With verify the values are read a second time, so they must be a
+    # sequence (or a file view) rather than a one shot iterator. Returns None
+    # when no value occurs more than half of the time.
+    candidate = majority_candidate(values)
+    if verify and (candidate is None or not is_majority(candidate, values)):
+        return None
+    return candidate
+
+class HeavyHitters:
+    # Misra-Gries summary with at most `capacity` counters. A counter
+    # underestimates the true count of its value by at most n / (capacity + 1)
+    # for n values seen, so every value more frequent than that is kept.
+    # Summaries of different parts of a stream can be merged.
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counters = {}
+        self.total = 0
+
+    def update(self, value, count: int = 1):
+        self.total += count
+        counters = self.counters
+        if value in counters or len(counters) < self.capacity:
+            counters[value] = counters.get(value, 0) + count
+            return
+        # Decrement every counter (the new value included) by the smallest count.
+        decrement = min(count, min(counters.values()))
+        count -= decrement
+        for key in list(counters):
+            counters[key] -= decrement
+            if not counters[key]:
+                del counters[key]
+        if count:
+            # The smallest counter reached zero, so there is room now.
+            counters[value] = count
+
+    def update_many(self, values: Iterable):
+        # Counts a chunk (any iterable, array, memoryview or NumPy array) in C
+        # and adds it at once, memory stays bounded by the chunk.
+        counts = Counter(values)
+        self.update_counts(counts, sum(counts.values()))
+
+    def update_counts(self, counts: dict, total: int):
+        counters = self.counters
+        self.total += total
+        for value, count in counts.items():
+            counters[value] = counters.get(value, 0) + count
+        if len(counters) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count from every counter,
+            # which leaves at most `capacity` positive ones.
+            cutoff = sorted(counters.values(), reverse=True)[self.capacity]
+            self.counters = {value: count - cutoff for value, count in counters.items() if count > cutoff}
+
+    def consume(self, chunks: Iterable[Iterable]):
+        for chunk in chunks:
+            self.update_many(chunk)
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        merged = HeavyHitters(max(self.capacity, other.capacity))
+        merged.update_counts(self.counters, self.total)
+        merged.update_counts(other.counters, other.total)
+        return merged
+
+    def top(self, k: int | None = None) -> List[tuple]:
+        return sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def error_bound(self) -> float:
+        return self.total / (self.capacity + 1)
+
+@contextmanager
+def mapped_items(path: str, typecode: str = "q"):
+    # The items of a file written with array.tofile, as a memoryview into a
+    # memory map. Slices of it have to be released before the block ends.
+    with open(path, "rb") as fin:
+        if os.fstat(fin.fileno()).st_size == 0:
+            yield memoryview(b"").cast(typecode)
+            return
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view, view.cast(typecode) as items:
+            yield items
+
+def array_file_chunks(path: str, typecode: str = "q", chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Yields the items chunk_size at a time as memoryviews into the memory map,
+    # without reading them first. A chunk is released when the next one is
+    # requested, copy it (e.g. with tolist()) to keep it longer.
+    with mapped_items(path, typecode) as items:
+        for start in range(0, len(items), chunk_size):
+            with items[start:start + chunk_size] as chunk:
+                yield chunk
+
+def summarize(path: str, typecode: str, capacity: int, start: int, stop: int) -> HeavyHitters:
+    # A picklable unit of work for worker processes: every worker maps the
+    # file itself and summarizes items start:stop, merge the results.
+    summary = HeavyHitters(capacity)
+    with mapped_items(path, typecode) as items, items[start:stop] as chunk:
+        summary.update_many(chunk)
+    return summary
+
+def file_heavy_hitters(path: str, capacity: int, typecode: str = "q", jobs: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> HeavyHitters:
+    size = os.path.getsize(path) // array(typecode).itemsize
+    starts = range(0, size, chunk_size)
+    stops = [min(start + chunk_size, size) for start in starts]
+    work = partial(summarize, path, typecode, capacity)
+    if jobs <= 1:
+        return reduce(HeavyHitters.merge, map(work, starts, stops), HeavyHitters(capacity))
+    with ProcessPoolExecutor(jobs) as executor:
+        return reduce(HeavyHitters.merge, executor.map(work, starts, stops), HeavyHitters(capacity))
+
 class Solution:
     def majorityElement(self, nums: List[int]) -> int:
-        counter = {}
-        max_count = 0
-        max_num = 0
-        for k in nums:
-            if k not in counter:
-                counter[k] = 0
-            counter[k] += 1
-            if counter[k] > max_count:
-                max_count = counter[k]
-                max_num = k
-        return max_num
\ No newline at end of file
+        return majority_candidate(nums)
+
+def test_array_file_chunks(tmp_path):
+    path = tmp_path / "values.bin"
+    path.write_bytes(b"")
+    assert list(array_file_chunks(str(path))) == []
+    assert file_heavy_hitters(str(path), 2, jobs=2).top() == []
+    values = array("q", [3, 1, 3, 2, 3] * 5)
+    with open(path, "wb") as fout:
+        values.tofile(fout)
+    chunks = [chunk.tolist() for chunk in array_file_chunks(str(path), chunk_size=4)]
+    assert [value for chunk in chunks for value in chunk] == values.tolist()
+    assert majority_element(values) == 3
+    assert HeavyHitters(2).consume(array_file_chunks(str(path), chunk_size=4)).top(1)[0][0] == 3
+
+def test_file_heavy_hitters(tmp_path):
+    import random
+    rng = random.Random(0)
+    values = array("q", [rng.choice([7, 7, 7, 11, 11]) if rng.random() < 0.3 else rng.randrange(10**6) for _ in range(50000)])
+    path = tmp_path / "values.bin"
+    with open(path, "wb") as fout:
+        values.tofile(fout)
+    counts = Counter(values)
+    serial = file_heavy_hitters(str(path), 10, chunk_size=4096)
+    parallel = file_heavy_hitters(str(path), 10, jobs=2, chunk_size=4096)
+    for summary in (serial, parallel):
+        assert summary.total == len(values)
+        found = dict(summary.top())
+        for value in (7, 11):
+            assert counts[value] - summary.error_bound() <= found[value] <= counts[value]
+    assert serial.top(2) == parallel.top(2)
@@ -1,10 +1,138 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Sequence
+import heapq
+
+# The sorted inputs are only indexed, never copied or modified, so lists,
+# array.array, memoryview and NumPy arrays all work.
+
+def kth_of_two(nums1: Sequence, nums2: Sequence, k: int):
+    # The k-th smallest (from 0) element of two sorted sequences. Binary search
+    # for how many of the k + 1 smallest come from the shorter sequence.
+    if len(nums1) > len(nums2):
+        nums1, nums2 = nums2, nums1
+    m, n = len(nums1), len(nums2)
+    if not 0 <= k < m + n:
+        raise IndexError("k is out of range")
+    lo, hi = max(0, k + 1 - n), min(m, k + 1)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if nums1[i] < nums2[k - i]:
+            lo = i + 1
+        else:
+            hi = i
+    j = k + 1 - lo
+    if lo == 0:
+        return nums2[j - 1]
+    if j == 0:
+        return nums1[lo - 1]
+    return max(nums1[lo - 1], nums2[j - 1])
+
+def kth_smallest(sequences: Sequence[Sequence], k: int):
+    # The k-th smallest (from 0) element of any number of sorted sequences.
+    # Every round the pivot is the weighted median of the middle elements of
+    # the remaining ranges, so at least a quarter of them is dropped.
+    lo = [0] * len(sequences)
+    hi = [len(sequence) for sequence in sequences]
+    if not 0 <= k < sum(hi):
+        raise IndexError("k is out of range")
+    while True:
+        middles = sorted((sequences[idx][(lo[idx] + hi[idx]) // 2], hi[idx] - lo[idx]) for idx in range(len(sequences)) if lo[idx] < hi[idx])
+        half = sum(weight for _, weight in middles) / 2
+        for pivot, weight in middles:
+            half -= weight
+            if half <= 0:
+                break
+        below = [bisect_left(sequence, pivot, lo[idx], hi[idx]) for idx, sequence in enumerate(sequences)]
+        num_below = sum(below[idx] - lo[idx] for idx in range(len(sequences)))
+        if k < num_below:
+            hi = below
+            continue
+        upto = [bisect_right(sequence, pivot, below[idx], hi[idx]) for idx, sequence in enumerate(sequences)]
+        num_upto = sum(upto[idx] - lo[idx] for idx in range(len(sequences)))
+        if k < num_upto:
+            return pivot
+        k -= num_upto
+        lo = upto
+
+def median_of_two(nums1: Sequence, nums2: Sequence) -> float:
+    n = len(nums1) + len(nums2)
+    if n % 2 == 0:
+        return (kth_of_two(nums1, nums2, n // 2 - 1) + kth_of_two(nums1, nums2, n // 2)) / 2
+    return kth_of_two(nums1, nums2, n // 2)
+
+def median(sequences: Sequence[Sequence]) -> float:
+    n = sum(len(sequence) for sequence in sequences)
+    if n % 2 == 0:
+        return (kth_smallest(sequences, n // 2 - 1) + kth_smallest(sequences, n // 2)) / 2
+    return kth_smallest(sequences, n // 2)
+
+class RunningMedian:
+    # Median of a stream in O(log n) per value: a max heap (stored negated)
+    # with the lower half and a min heap with the upper half, the lower half
+    # holds the extra value when the count is odd.
+    def __init__(self, values=()):
+        self.lower = []
+        self.upper = []
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return len(self.lower) + len(self.upper)
+
+    def add(self, value):
+        if self.lower and value > -self.lower[0]:
+            heapq.heappush(self.upper, value)
+            if len(self.upper) > len(self.lower):
+                heapq.heappush(self.lower, -heapq.heappop(self.upper))
+        else:
+            heapq.heappush(self.lower, -value)
+            if len(self.lower) > len(self.upper) + 1:
+                heapq.heappush(self.upper, -heapq.heappop(self.lower))
+
+    def median(self) -> float:
+        if not self.lower:
+            raise IndexError("median of an empty stream")
+        if len(self.lower) > len(self.upper):
+            return -self.lower[0]
+        return (-self.lower[0] + self.upper[0]) / 2
+
 class Solution:
     def findMedianSortedArrays(self, nums1: List[int], nums2: List[int]) -> float:
-        nums1.extend(nums2)
-        nums1 = sorted(nums1)
-        n = len(nums1)
-        if n % 2 == 0:
-            median = (nums1[n // 2 - 1] + nums1[n // 2]) / 2
-        else:
-            median = nums1[n // 2]
-        return median
\ No newline at end of file
+        return median_of_two(nums1, nums2)
+
+def test_kth_smallest():
+    import random
+    from array import array
+    rng = random.Random(0)
+    for _ in range(500):
+        sequences = [sorted(rng.randint(0, rng.choice([3, 1000])) for _ in range(rng.randint(0, 12))) for _ in range(rng.randint(1, 5))]
+        merged = sorted(value for sequence in sequences for value in sequence)
+        for k in range(len(merged)):
+            assert kth_smallest(sequences, k) == merged[k]
+            if len(sequences) == 2:
+                assert kth_of_two(*sequences, k) == merged[k]
+        try:
+            kth_smallest(sequences, len(merged))
+            assert False, "k past the end was accepted"
+        except IndexError:
+            pass
+    assert kth_smallest([array("q", [5] * 1000), [5] * 7], 500) == 5
+
+def test_median():
+    import random
+    import statistics
+    rng = random.Random(1)
+    for _ in range(500):
+        sequences = [sorted(rng.randint(-50, 50) for _ in range(rng.randint(0, 10))) for _ in range(3)]
+        merged = [value for sequence in sequences for value in sequence]
+        if not merged:
+            continue
+        assert median(sequences) == statistics.median(merged)
+        if sequences[0] or sequences[1]:
+            assert Solution().findMedianSortedArrays(sequences[0], sequences[1]) == statistics.median(sequences[0] + sequences[1])
+        stream = RunningMedian()
+        seen = []
+        for value in rng.sample(merged, len(merged)):
+            stream.add(value)
+            seen.append(value)
+            assert len(stream) == len(seen) and stream.median() == statistics.median(seen)
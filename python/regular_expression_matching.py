@@ -1,58 +1,101 @@
+from functools import lru_cache
+import argparse
+import json
+import random
+import time
+
 MATCH_ONE = "MATCH-ONE"
 MATCH_ZERO_OR_MORE = "MATCH-ZERO-OR-MORE"
 
+PATTERN_CACHE_SIZE = 1024
+# Lazily built DFA states kept per pattern, the cache starts over when full.
+DFA_CACHE_SIZE = 4096
+
 class Regex:
     def __init__(self, pattern):
         self.matchers = []
         self.parse(pattern)
+        self.build([self.matchers])
 
     def match(self, s):
-        return self.next(s, 0, 0)
-
-    def next(self, s, s_idx, m_idx):
-        if m_idx == len(self.matchers) and s_idx == len(s):
-            return True
-        if m_idx >= len(self.matchers):
-            return False
-        if s_idx >= len(s):
-            m_type, _ = self.matchers[m_idx]
-            if m_type == MATCH_ZERO_OR_MORE:
-                return self.next(s, s_idx, m_idx + 1)
-            return False
-        m_type, _ = self.matchers[m_idx]
-        if m_type == MATCH_ONE:
-            return self.match_one(s, s_idx, m_idx)
-        if m_type == MATCH_ZERO_OR_MORE:
-            if self.match_zero_or_more(s, s_idx, m_idx):
-                return True
-        return False
-    
-    def match_one(self, s, s_idx, m_idx):
-        # match a single character in the string at index s_idx + 1
-        _, m_char = self.matchers[m_idx]
-        if m_char == '.' or m_char == s[s_idx]:
-            return self.next(s, s_idx + 1, m_idx + 1)
-        return False
-
-    def match_zero_or_more(self, s, s_idx, m_idx):
-        # repeated match one
-        _, m_char = self.matchers[m_idx]
-        i = 0
-        while s_idx + i < len(s) and (s[s_idx + i] == m_char or m_char == '.'):
-            i += 1
-            if self.next(s, s_idx + i, m_idx + 1):
-                return True
-        return self.next(s, s_idx, m_idx + 1)
-        
+        return bool(self.run(s) & self.accept)
+
+    def run(self, s):
+        # Runs the DFA, one dictionary lookup per character of s, and returns
+        # the final set of NFA states (0 once nothing can match any more).
+        state = self.start
+        transitions = self.transitions.get(state)
+        if transitions is None:
+            transitions = self.add_state(state)
+        for char in s:
+            next_state = transitions.get(char)
+            if next_state is None:
+                next_state = self.step(state, char)
+            if not next_state:
+                return 0
+            state = next_state
+            transitions = self.transitions.get(state)
+            if transitions is None:
+                transitions = self.add_state(state)
+        return state
+
+    def build(self, programs):
+        # The matchers of every program are laid out after each other, each
+        # followed by an accepting slot. NFA state i means "matched up to slot
+        # i", and is bit i of an int, so a set of states is a DFA state and a
+        # step moves all states at once with shifts and masks.
+        self.accepts = []
+        self.one_mask = 0
+        self.zero_or_more_mask = 0
+        self.char_masks = {}
+        start = 0
+        idx = 0
+        for matchers in programs:
+            start |= 1 << idx
+            for m_type, m_char in matchers:
+                if m_type == MATCH_ONE:
+                    self.one_mask |= 1 << idx
+                else:
+                    self.zero_or_more_mask |= 1 << idx
+                self.char_masks[m_char] = self.char_masks.get(m_char, 0) | 1 << idx
+                idx += 1
+            self.accepts.append(1 << idx)
+            idx += 1
+        self.any_mask = self.char_masks.pop('.', 0)
+        self.accept = sum(self.accepts)
+        self.start = self.closure(start)
+        self.transitions = {}
+
+    def closure(self, state):
+        # A zero-or-more matcher can always be skipped.
+        while True:
+            skipped = (state & self.zero_or_more_mask) << 1
+            if not skipped & ~state:
+                return state
+            state |= skipped
+
+    def add_state(self, state):
+        if len(self.transitions) >= DFA_CACHE_SIZE:
+            self.transitions.clear()
+        transitions = self.transitions[state] = {}
+        return transitions
+
+    def step(self, state, char):
+        matched = state & (self.char_masks.get(char, 0) | self.any_mask)
+        next_state = self.closure((matched & self.one_mask) << 1 | matched & self.zero_or_more_mask)
+        transitions = self.transitions.get(state)
+        if transitions is None:
+            transitions = self.add_state(state)
+        transitions[char] = next_state
+        return next_state
+
     def parse(self, pattern) -> None:
         i = 0
         while i < len(pattern):
             char = pattern[i]
-            if 'a' <= char <= 'z':
-                self.matchers.append((MATCH_ONE, char))
-            elif char == '.':
+            if char != '*':
                 self.matchers.append((MATCH_ONE, char))
-            elif char == '*':
+            else:
                 self.matchers.pop()
                 if self.matchers:
                     m_type, m_char = self.matchers[-1]
@@ -61,12 +104,132 @@ class Regex:
                 self.matchers.append((MATCH_ZERO_OR_MORE, pattern[i-1]))
             i += 1
 
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def cached_regex(pattern) -> Regex:
+    # Compiled patterns keep their DFA states, so repeated patterns stay warm.
+    return Regex(pattern)
+
+class RegexSet(Regex):
+    # All patterns in one automaton, a single scan of s gives the indices of
+    # every pattern that matches it.
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        programs = []
+        for pattern in self.patterns:
+            self.matchers = []
+            self.parse(pattern)
+            programs.append(self.matchers)
+        self.build(programs)
+        self.matched_ids = {}
+
+    def match(self, s):
+        state = self.run(s) & self.accept
+        if state not in self.matched_ids:
+            self.matched_ids[state] = tuple(pattern_id for pattern_id, accept in enumerate(self.accepts) if state & accept)
+        return self.matched_ids[state]
+
+    def match_lines(self, lines):
+        # Yields the matching pattern indices for every line, without its newline.
+        for line in lines:
+            yield self.match(line.rstrip("\n"))
+
+def benchmark_regex_set(num_patterns=1000, num_lines=2000, seed=0) -> dict:
+    # Log like lines out of a small vocabulary, and patterns that look for
+    # one or two words in them.
+    rng = random.Random(seed)
+    words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 8))) for _ in range(200)]
+    lines = [" ".join(rng.choices(words, k=rng.randint(5, 15))) for _ in range(num_lines)]
+    patterns = []
+    for _ in range(num_patterns):
+        chosen = [word[:1] + "." + word[2:] if rng.random() < 0.3 else word for word in rng.sample(words, rng.randint(1, 2))]
+        patterns.append(".*" + ".*".join(chosen) + ".*")
+    start = time.perf_counter()
+    regexes = [Regex(pattern) for pattern in patterns]
+    loop_compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = [tuple(pattern_id for pattern_id, regex in enumerate(regexes) if regex.match(line)) for line in lines]
+    loop_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    regex_set = RegexSet(patterns)
+    set_compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    found = list(regex_set.match_lines(lines))
+    set_seconds = time.perf_counter() - start
+    return {
+        "patterns": num_patterns,
+        "lines": num_lines,
+        "matches": sum(len(ids) for ids in found),
+        "loop_compile_seconds": round(loop_compile_seconds, 4),
+        "loop_seconds": round(loop_seconds, 4),
+        "set_compile_seconds": round(set_compile_seconds, 4),
+        "set_seconds": round(set_seconds, 4),
+        "set_dfa_states": len(regex_set.transitions),
+        "speedup": round(loop_seconds / set_seconds, 2) if set_seconds else None,
+        "same_matches": found == expected,
+    }
+
 class Solution:
     def isMatch(self, s: str, p: str) -> bool:
-        regex = Regex(p)
-        return regex.match(s)
+        return cached_regex(p).match(s)
     
+def main():
+    parser = argparse.ArgumentParser(description="Regular expression matching with '.' and '*'")
+    subparsers = parser.add_subparsers(dest="command")
+    benchmark_parser = subparsers.add_parser("benchmark", help="Compare a RegexSet scan with matching every pattern on its own, written as JSON")
+    benchmark_parser.add_argument("--patterns", type=int, default=1000, help="Number of patterns")
+    benchmark_parser.add_argument("--lines", type=int, default=2000, help="Number of input lines")
+    benchmark_parser.add_argument("--seed", type=int, default=0, help="Seed for the generated patterns and lines")
+    args = parser.parse_args()
+    if args.command == "benchmark":
+        print(json.dumps(benchmark_regex_set(args.patterns, args.lines, args.seed), indent=2))
+    else:
+        s = Solution()
+        result = s.isMatch("aaaaaaaaaaaaaaaaaaab", "a*a*a*a*a*a*a*a*a*a*")
+        print(result)
+
+if __name__ == "__main__":
+    main()
+
+def random_pattern(rng, alphabet="ab.", max_length=5):
+    return "".join(rng.choice(alphabet) + ("*" if rng.random() < 0.4 else "") for _ in range(rng.randint(0, max_length)))
+
+def test_regex_matches_re():
+    import re
+    rng = random.Random(0)
+    for _ in range(3000):
+        pattern = random_pattern(rng)
+        s = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        assert Solution().isMatch(s, pattern) == (re.fullmatch(pattern, s) is not None), (s, pattern)
+
+def test_regex_is_linear():
+    start = time.perf_counter()
+    assert not Solution().isMatch("a" * 10000 + "b", "a*" * 50)
+    assert Solution().isMatch("ab" * 10000, ".*ab.*b")
+    assert time.perf_counter() - start < 1
+
+def test_regex_dfa_cache_reset():
+    import re
+    global DFA_CACHE_SIZE
+    cache_size = DFA_CACHE_SIZE
+    DFA_CACHE_SIZE = 2
+    try:
+        regex = Regex(".*a...")
+        for s in ["aaaaaaa", "abbbb", "bbabbbb", "aabab", "bbbbbbb"]:
+            assert regex.match(s) == (re.fullmatch(".*a...", s) is not None)
+    finally:
+        DFA_CACHE_SIZE = cache_size
+
+def test_regex_set_matches_re():
+    import re
+    rng = random.Random(1)
+    for _ in range(300):
+        patterns = [random_pattern(rng, "ab.x") for _ in range(rng.randint(1, 8))]
+        regex_set = RegexSet(patterns)
+        lines = ["".join(rng.choice("abx") for _ in range(rng.randint(0, 8))) for _ in range(20)]
+        expected = [tuple(idx for idx, pattern in enumerate(patterns) if re.fullmatch(pattern, line)) for line in lines]
+        assert [regex_set.match(line) for line in lines] == expected, patterns
+        assert list(regex_set.match_lines(line + "\n" for line in lines)) == expected
 
-s = Solution()
-result = s.isMatch("aaaaaaaaaaaaaaaaaaab", "a*a*a*a*a*a*a*a*a*a*")
-print(result)
\ No newline at end of file
+def test_benchmark_regex_set():
+    report = benchmark_regex_set(num_patterns=50, num_lines=100)
+    assert report["same_matches"] and report["matches"] > 0
@@ -1,14 +1,23 @@
+from typing import List
+
 class Solution:
     def removeDuplicates(self, nums: List[int]) -> int:
-        memo = {}
-        i = 0
-        while i < len(nums):
-            if nums[i] in memo:
-                memo[nums[i]] += 1
-                if memo[nums[i]] > 2:
-                    nums.pop(i)
-                    continue
-            else:
-                memo[nums[i]] = 1
-            i += 1
-        return len(nums)
\ No newline at end of file
+        # In place: a value is kept unless the output already ends with two
+        # copies of it, which in sorted input is the item two places back.
+        write = 0
+        for value in nums:
+            if write < 2 or nums[write - 2] != value:
+                nums[write] = value
+                write += 1
+        return write
+
+def test_remove_duplicates():
+    import random
+    from array import array
+    rng = random.Random(0)
+    for _ in range(500):
+        values = sorted(rng.randint(0, 6) for _ in range(rng.randint(0, 30)))
+        expected = [value for idx, value in enumerate(values) if values[max(0, idx - 2):idx].count(value) < 2]
+        for nums in (list(values), array("q", values), memoryview(array("q", values))):
+            length = Solution().removeDuplicates(nums)
+            assert list(nums[:length]) == expected
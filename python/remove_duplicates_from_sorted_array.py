@@ -1,6 +1,32 @@
+from typing import List
+
+def remove_duplicates(nums, allowed: int = 1) -> int:
+    # Keeps at most `allowed` copies of every value of a sorted nums, in place
+    # and with O(1) extra memory. An item is kept when it differs from the
+    # item `allowed` places before it in the output. nums can be a list, an
+    # array.array, a memoryview (e.g. over an mmap) or a NumPy array. Items
+    # after the returned length are left as is.
+    if allowed < 1:
+        raise ValueError("allowed must be at least 1")
+    write = 0
+    for value in nums:
+        if write < allowed or nums[write - allowed] != value:
+            nums[write] = value
+            write += 1
+    return write
+
 class Solution:
     def removeDuplicates(self, nums: List[int]) -> int:
-        result = sorted(list(set(nums)))
-        nums.clear()
-        nums.extend(result)
-        return len(nums)
\ No newline at end of file
+        return remove_duplicates(nums)
+
+def test_remove_duplicates():
+    import random
+    from array import array
+    rng = random.Random(0)
+    for _ in range(500):
+        values = sorted(rng.randint(0, 6) for _ in range(rng.randint(0, 30)))
+        for allowed in (1, 2, 3):
+            expected = [value for idx, value in enumerate(values) if values[max(0, idx - allowed):idx].count(value) < allowed]
+            for nums in (list(values), array("q", values), memoryview(array("q", values))):
+                length = remove_duplicates(nums, allowed)
+                assert list(nums[:length]) == expected
@@ -1,7 +1,27 @@
+from typing import List
+
+def remove_element(nums, val) -> int:
+    # Moves the items to keep to the front, in place and with O(1) extra
+    # memory. nums can be a list, an array.array, a memoryview (e.g. over an
+    # mmap) or a NumPy array. Items after the returned length are left as is.
+    write = 0
+    for value in nums:
+        if value != val:
+            nums[write] = value
+            write += 1
+    return write
+
 class Solution:
     def removeElement(self, nums: List[int], val: int) -> int:
-        result = filter(lambda x: x != val, nums)
-        result = list(result)
-        nums.clear()
-        nums.extend(result)
-        return len(nums)
\ No newline at end of file
+        return remove_element(nums, val)
+
+def test_remove_element():
+    import random
+    from array import array
+    rng = random.Random(0)
+    for _ in range(500):
+        values = [rng.randint(0, 4) for _ in range(rng.randint(0, 30))]
+        expected = [value for value in values if value != 2]
+        for nums in (list(values), array("q", values), memoryview(array("q", values))):
+            length = remove_element(nums, 2)
+            assert list(nums[:length]) == expected
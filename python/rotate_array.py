@@ -1,9 +1,48 @@
+from array import array
 from typing import List
+
+# Items moved at a time, extra memory stays at a few blocks whatever the size
+# of nums, which can be a list, an array.array, a memoryview (e.g. over an
+# mmap) or a NumPy array.
+BLOCK_SIZE = 1 << 16
+
+def copy_block(nums, start: int, stop: int):
+    block = nums[start:stop]
+    if isinstance(block, memoryview):
+        return memoryview(block.tobytes()).cast(block.format)
+    if not isinstance(block, (list, array)):
+        # NumPy slices are views.
+        block = block.copy()
+    return block
+
+def reverse(nums, start: int = 0, stop: int | None = None, block_size: int = BLOCK_SIZE) -> None:
+    # Swaps reversed blocks from both ends towards the middle.
+    i, j = start, len(nums) if stop is None else stop
+    while j - i >= 2 * block_size:
+        front = copy_block(nums, i, i + block_size)
+        back = copy_block(nums, j - block_size, j)
+        nums[i:i + block_size] = back[::-1]
+        nums[j - block_size:j] = front[::-1]
+        i += block_size
+        j -= block_size
+    if j - i > 1:
+        nums[i:j] = copy_block(nums, i, j)[::-1]
+
+def rotate(nums, k: int, block_size: int = BLOCK_SIZE) -> None:
+    # Rotates right by k with three reversals, every item is moved twice.
+    n = len(nums)
+    if not n:
+        return
+    k %= n
+    if not k:
+        return
+    reverse(nums, 0, n, block_size)
+    reverse(nums, 0, k, block_size)
+    reverse(nums, k, n, block_size)
+
 class Solution:
     def rotate(self, nums: List[int], k: int) -> None:
         """
         Do not return anything, modify nums in-place instead.
         """
-        for _ in range(k):
-            temp = nums.pop()
-            nums.insert(0, temp)    
\ No newline at end of file
+        rotate(nums, k)
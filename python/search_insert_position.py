@@ -1,9 +1,161 @@
-from typing import List
+from array import array
+from bisect import bisect_left
+from functools import partial
+from typing import Iterable, List, Sequence
+import argparse
+import json
+import random
+import time
 
+# Indexes over sorted data, built once and queried many times. They all answer
+# insert_position (the index where target would be inserted to keep the order,
+# like bisect_left) for one target or for a batch.
+
+DEFAULT_BLOCK_SIZE = 64
+
+class BisectIndex:
+    # Binary search straight on the sorted data, which is not copied.
+    def __init__(self, values: Sequence):
+        self.values = values
+
+    def insert_position(self, target) -> int:
+        return bisect_left(self.values, target)
+
+    def insert_positions(self, targets: Iterable, sorted_targets: bool = False) -> List[int]:
+        if not sorted_targets:
+            return list(map(partial(bisect_left, self.values), targets))
+        # Every answer is at least the previous one, so the search range shrinks.
+        values = self.values
+        positions = []
+        position = 0
+        for target in targets:
+            position = bisect_left(values, target, position)
+            positions.append(position)
+        return positions
+
+class BlockedIndex(BisectIndex):
+    # Two levels like a B-tree: every block_size-th value in a small list that
+    # stays in cache, then a search inside one block of the data.
+    def __init__(self, values: Sequence, block_size: int = DEFAULT_BLOCK_SIZE):
+        super().__init__(values)
+        self.block_size = block_size
+        self.top = list(values[::block_size])
+
+    def insert_position(self, target) -> int:
+        block = bisect_left(self.top, target)
+        return bisect_left(self.values, target, max(0, (block - 1) * self.block_size), min(len(self.values), block * self.block_size))
+
+    def insert_positions(self, targets: Iterable, sorted_targets: bool = False) -> List[int]:
+        return list(map(self.insert_position, targets))
+
+class EytzingerIndex:
+    # The values in breadth first order of a complete binary search tree
+    # (children of k at 2k and 2k + 1), so the first levels of every search
+    # share the same few cache lines. rank maps a tree slot to its index in
+    # the sorted data.
+    def __init__(self, values: Sequence, typecode: str = "q"):
+        n = len(values)
+        self.size = n
+        self.tree = array(typecode, bytes(array(typecode).itemsize * (n + 1)))
+        self.rank = array("q", bytes(8 * (n + 1)))
+        # In-order walk of the tree fills the slots with the sorted values.
+        idx = 0
+        slot = 1
+        stack = []
+        while stack or slot <= n:
+            while slot <= n:
+                stack.append(slot)
+                slot *= 2
+            slot = stack.pop()
+            self.tree[slot] = values[idx]
+            self.rank[slot] = idx
+            idx += 1
+            slot = 2 * slot + 1
+
+    def insert_position(self, target) -> int:
+        tree, n = self.tree, self.size
+        slot = 1
+        while slot <= n:
+            slot = 2 * slot + (tree[slot] < target)
+        # Undo the right turns after the last left turn, that node is the answer.
+        slot >>= (~slot & (slot + 1)).bit_length()
+        return self.rank[slot] if slot else n
+
+    def insert_positions(self, targets: Iterable, sorted_targets: bool = False) -> List[int]:
+        return list(map(self.insert_position, targets))
+
+LAYOUTS = {"bisect": BisectIndex, "blocked": BlockedIndex, "eytzinger": EytzingerIndex}
+
+def benchmark_search(sizes=(10**6,), num_queries=10**6, layouts=tuple(LAYOUTS), seed=0) -> dict:
+    # Sorted even numbers in an array('q') (8 bytes per value, so 10^8 values
+    # take 800 MB), and random queries answered one by one, as an unsorted
+    # batch and as a sorted batch.
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        values = array("q", range(0, 2 * size, 2))
+        queries = [rng.randrange(-1, 2 * size + 1) for _ in range(num_queries)]
+        sorted_queries = sorted(queries)
+        expected = [bisect_left(values, query) for query in queries]
+        for layout in layouts:
+            start = time.perf_counter()
+            index = LAYOUTS[layout](values)
+            build_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            single = [index.insert_position(query) for query in queries]
+            single_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            batch = index.insert_positions(queries)
+            batch_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            index.insert_positions(sorted_queries, sorted_targets=True)
+            sorted_batch_seconds = time.perf_counter() - start
+            results.append({
+                "layout": layout,
+                "size": size,
+                "queries": num_queries,
+                "build_seconds": round(build_seconds, 4),
+                "single_queries_per_second": round(num_queries / single_seconds),
+                "batch_queries_per_second": round(num_queries / batch_seconds),
+                "sorted_batch_queries_per_second": round(num_queries / sorted_batch_seconds),
+                "correct": single == expected and batch == expected,
+            })
+    return {"seed": seed, "results": results}
 
 class Solution:
     def searchInsert(self, nums: List[int], target: int) -> int:
-        i = 0
-        while i < len(nums) and target > nums[i]:
-            i += 1
-        return i
\ No newline at end of file
+        return bisect_left(nums, target)
+
+def main():
+    parser = argparse.ArgumentParser(description="Search insert position")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    benchmark_parser = subparsers.add_parser("benchmark", help="Compare the index layouts, written as JSON")
+    benchmark_parser.add_argument("--sizes", default="1e6", help="Comma separated number of values, e.g. 1e6,1e7,1e8")
+    benchmark_parser.add_argument("--queries", default="1e6", help="Number of queries")
+    benchmark_parser.add_argument("--layouts", default=",".join(LAYOUTS), help=f"Comma separated layouts out of {', '.join(LAYOUTS)}")
+    benchmark_parser.add_argument("--seed", type=int, default=0, help="Seed for the queries")
+    args = parser.parse_args()
+    if args.command == "benchmark":
+        sizes = [int(float(size)) for size in args.sizes.split(",")]
+        print(json.dumps(benchmark_search(sizes, int(float(args.queries)), args.layouts.split(","), args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
+
+def test_layouts_match_bisect():
+    rng = random.Random(0)
+    for size in list(range(0, 70)) + [200, 1000]:
+        values = sorted(rng.randrange(2 * size + 1) for _ in range(size))
+        targets = [rng.randrange(-2, 2 * size + 3) for _ in range(50)] + values
+        expected = [bisect_left(values, target) for target in targets]
+        for layout, index_class in LAYOUTS.items():
+            index = index_class(values) if layout != "blocked" else index_class(values, block_size=4)
+            assert [index.insert_position(target) for target in targets] == expected, (layout, size)
+            assert index.insert_positions(targets) == expected, (layout, size)
+            assert index.insert_positions(sorted(targets), sorted_targets=True) == sorted(expected), (layout, size)
+
+def test_eytzinger_array_values():
+    values = array("q", range(0, 2000, 2))
+    index = EytzingerIndex(values)
+    assert [index.insert_position(target) for target in range(-1, 2002)] == [bisect_left(values, target) for target in range(-1, 2002)]
+    assert EytzingerIndex([]).insert_position(5) == 0
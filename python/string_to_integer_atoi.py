@@ -1,3 +1,59 @@
+from array import array
+import argparse
+import json
+import random
+import re
+import time
+
+INT_MIN = -2**31
+INT_MAX = 2**31 - 1
+# Fields handed to int() at once by parse_many.
+PARSE_BLOCK_SIZE = 4096
+
+# Leading whitespace, an optional sign and the digits up to the first other character.
+ATOI_PATTERN = re.compile(rb"\s*([+-]?\d+)")
+
+def clamp(x, a, b):
+    if x < a: return a
+    if x > b: return b
+    return x
+
+def atoi_bytes(field: bytes) -> int:
+    match = ATOI_PATTERN.match(field)
+    if not match:
+        return 0
+    return clamp(int(match.group(1)), INT_MIN, INT_MAX)
+
+def parse_many(buffer: bytes | memoryview, sep: bytes = b",") -> array:
+    # Parses every field between separators like myAtoi. int() parses a block
+    # of fields in C when they are all plain numbers (it also allows
+    # surrounding whitespace, as atoi does). Fields with trailing text, empty
+    # fields and underscores, which int() reads differently, send only their
+    # own block through atoi_bytes. Values are clamped one by one only if any
+    # is out of range.
+    # split needs bytes, so anything else (a memoryview, a memory map) is
+    # copied once first, and split then allocates a bytes object per field.
+    # NumPy users can wrap the result with numpy.frombuffer without a copy.
+    if not isinstance(buffer, bytes):
+        buffer = bytes(buffer)
+    fields = buffer.split(sep)
+    underscores = b"_" in buffer
+    values = []
+    for start in range(0, len(fields), PARSE_BLOCK_SIZE):
+        block = fields[start:start + PARSE_BLOCK_SIZE]
+        if not underscores or b"_" not in sep.join(block):
+            try:
+                block_values = list(map(int, block))
+            except ValueError:
+                pass
+            else:
+                values += block_values
+                continue
+        values += map(atoi_bytes, block)
+    if values and (min(values) < INT_MIN or max(values) > INT_MAX):
+        values = [clamp(value, INT_MIN, INT_MAX) for value in values]
+    return array('i', values)
+
 class Solution:
     def myAtoi(self, s: str) -> int:
         sign = 1
@@ -18,8 +74,56 @@ class Solution:
         if not buffer:
             return 0
         num = sign * int("".join(buffer))
-        return Solution.clamp(num, -2**31, 2**31-1)
-    def clamp(x, a, b):
-        if x < a: return a
-        if x > b: return b
-        return x
\ No newline at end of file
+        return clamp(num, INT_MIN, INT_MAX)
+
+def benchmark_parse_many(count=1_000_000, seed=0) -> dict:
+    # Comma separated fields, mostly plain numbers; `one_bad` has a single
+    # field with trailing text in the middle and `messy` adds padding,
+    # trailing text and out of range values so the slower path is measured too.
+    rng = random.Random(seed)
+    fields = [str(rng.randint(INT_MIN, INT_MAX)) for _ in range(count)]
+    plain = ",".join(fields).encode()
+    fields[count // 2] = "12abc"
+    one_bad = ",".join(fields).encode()
+    messy = ",".join(rng.choice([" {}", "{}abc", "+{}", "{}0000000000"]).format(rng.randint(-999, 999)) for _ in range(count)).encode()
+    results = []
+    for name, buffer in (("plain", plain), ("one_bad", one_bad), ("messy", messy)):
+        start = time.perf_counter()
+        expected = [Solution().myAtoi(field) for field in buffer.decode().split(",")]
+        per_call_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        values = parse_many(buffer)
+        parse_many_seconds = time.perf_counter() - start
+        results.append({
+            "input": name,
+            "fields": count,
+            "bytes": len(buffer),
+            "per_call_seconds": round(per_call_seconds, 4),
+            "parse_many_seconds": round(parse_many_seconds, 4),
+            "speedup": round(per_call_seconds / parse_many_seconds, 2),
+            "same_values": values.tolist() == expected,
+        })
+    return {"results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="String to integer (atoi)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    benchmark_parser = subparsers.add_parser("benchmark", help="Compare parse_many with calling myAtoi per field, written as JSON")
+    benchmark_parser.add_argument("--count", type=int, default=1_000_000, help="Number of fields")
+    benchmark_parser.add_argument("--seed", type=int, default=0, help="Seed for the generated fields")
+    args = parser.parse_args()
+    if args.command == "benchmark":
+        print(json.dumps(benchmark_parse_many(args.count, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
+
+def test_parse_many():
+    fields = [b"42", b"   -42", b"4193 with words", b"words 987", b"", b"+-12", b"1_000", b" 12 ", b"-91283472332", b"2147483648", b"+0012"]
+    buffer = b",".join(fields * 3000)
+    expected = [Solution().myAtoi(field.decode()) for field in fields] * 3000
+    assert parse_many(buffer).tolist() == expected
+    assert parse_many(memoryview(buffer)).tolist() == expected
+    plain = b",".join(str(value).encode() for value in range(-5000, 5000))
+    assert parse_many(plain).tolist() == list(range(-5000, 5000))
+    assert parse_many(plain + b",7x,1_2").tolist() == list(range(-5000, 5000)) + [7, 1]
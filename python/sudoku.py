@@ -1,63 +1,86 @@
-from typing import List
-import heapq
-
-NUM_CELLS = 81
-NUM_DIGITS = 9
-
-groups = [
-    [ 0,  1,  2,  3,  4,  5,  6,  7,  8],
-    [ 9, 10, 11, 12, 13, 14, 15, 16, 17],
-    [18, 19, 20, 21, 22, 23, 24, 25, 26],
-    [27, 28, 29, 30, 31, 32, 33, 34, 35],
-    [36, 37, 38, 39, 40, 41, 42, 43, 44],
-    [45, 46, 47, 48, 49, 50, 51, 52, 53],
-    [54, 55, 56, 57, 58, 59, 60, 61, 62],
-    [63, 64, 65, 66, 67, 68, 69, 70, 71],
-    [72, 73, 74, 75, 76, 77, 78, 79, 80],
-    [ 0,  9, 18, 27, 36, 45, 54, 63, 72],
-    [ 1, 10, 19, 28, 37, 46, 55, 64, 73],
-    [ 2, 11, 20, 29, 38, 47, 56, 65, 74],
-    [ 3, 12, 21, 30, 39, 48, 57, 66, 75],
-    [ 4, 13, 22, 31, 40, 49, 58, 67, 76],
-    [ 5, 14, 23, 32, 41, 50, 59, 68, 77],
-    [ 6, 15, 24, 33, 42, 51, 60, 69, 78],
-    [ 7, 16, 25, 34, 43, 52, 61, 70, 79],
-    [ 8, 17, 26, 35, 44, 53, 62, 71, 80],
-    [ 0,  1,  2,  9, 10, 11, 18, 19, 20],
-    [ 3,  4,  5, 12, 13, 14, 21, 22, 23],
-    [ 6,  7,  8, 15, 16, 17, 24, 25, 26],
-    [27, 28, 29, 36, 37, 38, 45, 46, 47],
-    [30, 31, 32, 39, 40, 41, 48, 49, 50],
-    [33, 34, 35, 42, 43, 44, 51, 52, 53],
-    [54, 55, 56, 63, 64, 65, 72, 73, 74],
-    [57, 58, 59, 66, 67, 68, 75, 76, 77],
-    [60, 61, 62, 69, 70, 71, 78, 79, 80],
-]
+from typing import Iterable, Iterator, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+BOX_SIZE = 3
+NUM_DIGITS = BOX_SIZE * BOX_SIZE
+NUM_CELLS = NUM_DIGITS * NUM_DIGITS
+
+# Digits of grids up to 25x25, "." (or "0") is an empty cell.
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+def sudoku_groups(box_size: int) -> List[List[int]]:
+    # Cells of every row, column and box of a grid with boxes of box_size^2 cells.
+    size = box_size * box_size
+    rows = [[row * size + col for col in range(size)] for row in range(size)]
+    cols = [[row * size + col for row in range(size)] for col in range(size)]
+    boxes = [[(box_row + row) * size + box_col + col for row in range(box_size) for col in range(box_size)]
+             for box_row in range(0, size, box_size) for box_col in range(0, size, box_size)]
+    return rows + cols + boxes
+
+groups = sudoku_groups(BOX_SIZE)
+
+# Candidates and unit occupancy are 9-bit masks, bit `value` set for each digit.
+ALL_DIGITS = (1 << NUM_DIGITS) - 1
+POPCOUNT = [bin(mask).count("1") for mask in range(ALL_DIGITS + 1)]
+units_of = [[unit for unit, group in enumerate(groups) if cell in group] for cell in range(NUM_CELLS)]
+peers = [sorted({peer for unit in units_of[cell] for peer in groups[unit]} - {cell}) for cell in range(NUM_CELLS)]
 
 class SudokuSolver:
     def __init__(self):
         self.assignments = 0
         self.unassignments = 0
+        self.propagations = 0
+        self.nodes = 0
+        self.max_depth = 0
+        self.cells = [None] * NUM_CELLS
+        self.candidates = [ALL_DIGITS] * NUM_CELLS
+        self.used = [0] * len(groups)
+        self.trail = []
+
+    def load(self, puzzle_string: str) -> bool:
+        # Resets the solver to the givens of an 81 character puzzle, in which
+        # empty cells are "." or "0". Returns False when the givens conflict.
+        if len(puzzle_string) != NUM_CELLS:
+            raise ValueError(f"Puzzle must have {NUM_CELLS} cells, got {len(puzzle_string)}.")
         self.cells = [None] * NUM_CELLS
-        self.available_digits = [[True] * NUM_DIGITS for _ in range(NUM_CELLS)]
-        self.in_group = [[] for _ in range(NUM_CELLS)]
-        self.propagations = []
-        for group in groups:
-            for cell in group:
-                self.in_group[cell].append(group)
+        self.candidates = [ALL_DIGITS] * NUM_CELLS
+        self.used = [0] * len(groups)
+        self.trail.clear()
+        for idx, char in enumerate(puzzle_string):
+            if char not in ".0":
+                if not self.assign(idx, int(char) - 1):
+                    return False
+        return True
+
+    def solution_string(self) -> str:
+        return "".join(str(value + 1) for value in self.cells)
 
     def solve(self) -> bool:
+        if not self.propagate():
+            return False
 
         idx = self._find_mrv_cell()
         if idx is None:
-            return all(cell is not None for cell in self.cells)
+            return True
 
-        for value, available in enumerate(self.available_digits[idx]):
-            if available:
-                if self.set(idx, value):
-                    if self.solve():
-                        return True
-                self.unset(idx, value)
+        mask = self.candidates[idx]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            value = bit.bit_length() - 1
+            if self.set(idx, value):
+                if self.solve():
+                    return True
+            self.unset(idx, value)
 
         return False
 
@@ -66,34 +89,271 @@ class SudokuSolver:
         best_idx = None
         for idx, cell in enumerate(self.cells):
             if cell is None:
-                options = sum(self.available_digits[idx])
+                options = POPCOUNT[self.candidates[idx]]
                 if options < min_options:
                     min_options = options
                     best_idx = idx
-                    if options == 1:
+                    if options <= 2:
                         break
         return best_idx
 
     def set(self, idx: int, value: int) -> bool:
+        self.trail.append((self.cells[:], self.candidates[:], self.used[:]))
+        self.nodes += 1
+        if len(self.trail) > self.max_depth:
+            self.max_depth = len(self.trail)
+        return self.assign(idx, value)
+
+    def unset(self, idx: int, value: int):
+        self.unassignments += 1
+        self.cells, self.candidates, self.used = self.trail.pop()
+
+    def assign(self, idx: int, value: int) -> bool:
         self.assignments += 1
+        bit = 1 << value
+        candidates = self.candidates
+        if not candidates[idx] & bit:
+            return False
         self.cells[idx] = value
-        propagations = []
-        self.propagations.append(propagations)
-
-        for group in self.in_group[idx]:
-            for cell in group:
-                if cell != idx and self.available_digits[cell][value]:
-                    self.available_digits[cell][value] = False
-                    propagations.append((cell, value))
-                    if not any(self.available_digits[cell]) and self.cells[cell] is None:
+        candidates[idx] = bit
+        for unit in units_of[idx]:
+            self.used[unit] |= bit
+        for peer in peers[idx]:
+            mask = candidates[peer]
+            if mask & bit:
+                mask ^= bit
+                candidates[peer] = mask
+                if not mask:
+                    return False
+        return True
+
+    def propagate(self) -> bool:
+        # Assigns naked singles (a cell with one candidate) and hidden singles
+        # (a digit with one possible cell in a unit) until neither is left.
+        cells = self.cells
+        candidates = self.candidates
+        changed = True
+        while changed:
+            changed = False
+            for idx in range(NUM_CELLS):
+                if cells[idx] is None:
+                    mask = candidates[idx]
+                    if not mask:
                         return False
+                    if not mask & (mask - 1):
+                        self.propagations += 1
+                        if not self.assign(idx, mask.bit_length() - 1):
+                            return False
+                        changed = True
+            for unit, group in enumerate(groups):
+                seen_once = 0
+                seen_more = 0
+                for idx in group:
+                    if cells[idx] is None:
+                        mask = candidates[idx]
+                        seen_more |= seen_once & mask
+                        seen_once |= mask
+                missing = ALL_DIGITS & ~self.used[unit]
+                if seen_once & missing != missing:
+                    return False
+                hidden = seen_once & ~seen_more & missing
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for idx in group:
+                        if cells[idx] is None and candidates[idx] & bit:
+                            self.propagations += 1
+                            if not self.assign(idx, bit.bit_length() - 1):
+                                return False
+                            changed = True
+                            break
         return True
 
-    def unset(self, idx: int, value: int):
-        self.unassignments += 1
-        self.cells[idx] = None
-        for cell, val in self.propagations.pop():
-            self.available_digits[cell][val] = True
+# Exact cover (Algorithm X with dancing links) for grids of any box size. The
+# matrix has a column per cell, per (row, digit), per (column, digit) and per
+# (box, digit), and a row of four nodes per (cell, digit). The links are flat
+# lists; node 0 is the root, nodes 1..columns are the column headers.
+_exact_cover_templates = {}
+
+def exact_cover_template(box_size: int):
+    if box_size in _exact_cover_templates:
+        return _exact_cover_templates[box_size]
+    size = box_size * box_size
+    area = size * size
+    num_columns = 4 * area
+    left = [num_columns] + list(range(num_columns))
+    right = list(range(1, num_columns + 1)) + [0]
+    up = list(range(num_columns + 1))
+    down = list(range(num_columns + 1))
+    column = list(range(num_columns + 1))
+    count = [0] * (num_columns + 1)
+    for cell in range(area):
+        row, col = divmod(cell, size)
+        box = (row // box_size) * box_size + col // box_size
+        for digit in range(size):
+            first = len(column)
+            headers = (1 + cell, 1 + area + row * size + digit, 1 + 2 * area + col * size + digit, 1 + 3 * area + box * size + digit)
+            for offset, header in enumerate(headers):
+                node = first + offset
+                left.append(first + (offset - 1) % 4)
+                right.append(first + (offset + 1) % 4)
+                up.append(up[header])
+                down.append(header)
+                column.append(header)
+                down[up[header]] = node
+                up[header] = node
+                count[header] += 1
+    template = (size, num_columns, left, right, up, down, column, count)
+    _exact_cover_templates[box_size] = template
+    return template
+
+class DancingLinksSolver:
+    def __init__(self):
+        self.size = 0
+        self.cells = []
+        self.solutions = 0
+        self.nodes = 0
+        self.max_depth = 0
+        # Exact cover has no propagation step, kept for the same statistics as SudokuSolver.
+        self.propagations = 0
+
+    def load(self, puzzle_string: str) -> bool:
+        # Accepts a puzzle of box_size^4 cells for box sizes 2 to 5. Returns False
+        # when the givens conflict.
+        box_size = round(len(puzzle_string) ** 0.25)
+        if box_size < 2 or box_size ** 4 != len(puzzle_string) or box_size * box_size > len(SYMBOLS):
+            raise ValueError(f"Puzzle must have 16, 81, 256 or 625 cells, got {len(puzzle_string)}.")
+        size, self.num_columns, left, right, up, down, self.column, count = exact_cover_template(box_size)
+        self.size = size
+        self.left, self.right, self.up, self.down, self.count = left[:], right[:], up[:], down[:], count[:]
+        self.cells = [None] * (size * size)
+        self.givens = []
+        self.solutions = 0
+        for cell, char in enumerate(puzzle_string):
+            if char in ".0":
+                continue
+            digit = SYMBOLS.find(char.upper())
+            if not 0 <= digit < size:
+                raise ValueError(f"Invalid digit {char!r} for a {size}x{size} puzzle.")
+            node = self.num_columns + 1 + 4 * (cell * size + digit)
+            # A header that is already covered means a peer has the same digit.
+            for offset in range(4):
+                header = self.column[node + offset]
+                if self.right[self.left[header]] != header:
+                    return False
+            for offset in range(4):
+                self.cover(self.column[node + offset])
+            self.givens.append(node)
+        return True
+
+    def cover(self, header: int):
+        left, right, up, down, column, count = self.left, self.right, self.up, self.down, self.column, self.count
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                count[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header: int):
+        left, right, up, down, column, count = self.left, self.right, self.up, self.down, self.column, self.count
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                count[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def select(self, node: int):
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def deselect(self, node: int):
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+
+    def count_solutions(self, limit: int | None = None) -> int:
+        # Counts solutions, stopping once `limit` are found; limit=2 is enough to
+        # tell a unique puzzle apart. The first solution is stored in `cells`.
+        right, down, count = self.right, self.down, self.count
+        solutions = 0
+        nodes = 0
+        max_depth = 0
+        stack = []
+        while True:
+            backtrack = True
+            if right[0] == 0:
+                solutions += 1
+                if solutions == 1:
+                    self.store_solution(stack)
+                if limit is not None and solutions >= limit:
+                    break
+            else:
+                # Choose the column with the fewest remaining rows.
+                header = right[0]
+                best, best_count = header, count[header]
+                while header != 0 and best_count > 1:
+                    if count[header] < best_count:
+                        best, best_count = header, count[header]
+                    header = right[header]
+                if best_count:
+                    self.cover(best)
+                    node = down[best]
+                    self.select(node)
+                    stack.append(node)
+                    nodes += 1
+                    if len(stack) > max_depth:
+                        max_depth = len(stack)
+                    backtrack = False
+            while backtrack and stack:
+                node = stack.pop()
+                self.deselect(node)
+                header = self.column[node]
+                node = down[node]
+                if node != header:
+                    self.select(node)
+                    stack.append(node)
+                    nodes += 1
+                    backtrack = False
+                else:
+                    self.uncover(header)
+            if backtrack:
+                break
+        while stack:
+            node = stack.pop()
+            self.deselect(node)
+            self.uncover(self.column[node])
+        self.solutions = solutions
+        self.nodes += nodes
+        self.max_depth = max(self.max_depth, max_depth)
+        return solutions
+
+    def store_solution(self, stack: List[int]):
+        for node in self.givens + stack:
+            cell, digit = divmod((node - self.num_columns - 1) // 4, self.size)
+            self.cells[cell] = digit
+
+    def solve(self) -> bool:
+        return self.count_solutions(limit=1) > 0
+
+    def solution_string(self) -> str:
+        return "".join(SYMBOLS[value] for value in self.cells)
+
+ENGINES = {"mrv": SudokuSolver, "dlx": DancingLinksSolver}
 
 def get_leetcode_result(solver: SudokuSolver):
     rows = []
@@ -122,17 +382,253 @@ class Solution:
         board.clear()
         board.extend(get_leetcode_result(solver))
     def solveSudokuLocal(self, puzzle_string):
-        import time
-        start = time.time()
+        start = time.perf_counter()
         solver = SudokuSolver()
         for idx, char in enumerate(puzzle_string):
             if char != ".":
                 solver.set(idx, int(char)-1)
-        print(solver.available_digits)
         solver.solve()
-        end = time.time()
+        end = time.perf_counter()
         print("assignments", solver.assignments)
         print("unassignment", solver.unassignments)
+        print("propagations", solver.propagations)
         print("time (seconds)", end-start)
-  
-Solution().solveSudokuLocal("4...3.......6..8..........1....5..9..8....6...7.2........1.27..5.3....4.9........")
+
+# Batch solving. Every worker process has its own copy of the module level
+# tables (`groups`, `units_of`, `peers`) and reuses one solver for its chunks.
+
+DEFAULT_BATCH_CHUNK_SIZE = 256
+
+def solve_puzzle(puzzle_string: str, solver: SudokuSolver | None = None) -> str | None:
+    # Malformed puzzles (wrong length, other characters) are treated like
+    # unsolvable ones, so one bad line does not stop a batch.
+    solver = solver or SudokuSolver()
+    try:
+        if solver.load(puzzle_string) and solver.solve():
+            return solver.solution_string()
+    except ValueError:
+        pass
+    return None
+
+def count_solutions(puzzle_string: str, limit: int | None = 2) -> int:
+    solver = DancingLinksSolver()
+    if not solver.load(puzzle_string):
+        return 0
+    return solver.count_solutions(limit)
+
+def solve_chunk(puzzles: List[str], engine: str = "mrv") -> List[str | None]:
+    solver = ENGINES[engine]()
+    return [solve_puzzle(puzzle, solver) for puzzle in puzzles]
+
+def solve_batch(puzzles: Iterable[str], jobs: int | None = None, chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE, engine: str = "mrv") -> Iterator[str | None]:
+    # Yields the solution of every puzzle in input order, or None when a
+    # puzzle has no solution. At most two chunks per worker are in flight, so
+    # the input can be much larger than memory.
+    puzzles = iter(puzzles)
+    chunks = iter(lambda: list(islice(puzzles, chunk_size)), [])
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for chunk in chunks:
+            yield from solve_chunk(chunk, engine)
+        return
+    with ProcessPoolExecutor(jobs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(solve_chunk, chunk, engine))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+# Benchmark puzzles: easy ones are solved by propagation alone, hard ones need
+# a few hundred nodes, and the pathological ones are built against a specific
+# search order (the first one has many solutions and takes the MRV engine
+# tens of seconds).
+BENCHMARK_PUZZLES = {
+    "easy": [
+        "003020600900305001001806400008102900700000008006708200002609500800203009005010300",
+        "200080300060070084030500209000105408000000000402706000301007040720040060004010003",
+        "000000907000420180000705026100904000050000040000507009920108000034059000507000000",
+    ],
+    "hard": [
+        "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+        "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+        "6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....",
+        "48.3............71.2.......7.5....6....2..8.............1.76...3.....4......5....",
+        "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+        "4...3.......6..8..........1....5..9..8....6...7.2........1.27..5.3....4.9........",
+    ],
+    "pathological": [
+        ".....6....59.....82....8....45........3........6..3.54...325..6..................",
+        "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+        "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+    ],
+}
+
+def is_solution(puzzle_string: str, solution: str) -> bool:
+    box_size = round(len(puzzle_string) ** 0.25)
+    if len(solution) != len(puzzle_string) or any(given not in ".0" and given != value for given, value in zip(puzzle_string, solution)):
+        return False
+    return all(len({solution[idx] for idx in group}) == len(group) for group in sudoku_groups(box_size))
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest rank on an already sorted list.
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+def benchmark_engine(engine: str, puzzles: List[str], repeat: int = 1) -> dict:
+    # Only load and solve are timed, checking and reporting happen afterwards.
+    latencies = []
+    nodes = []
+    max_depth = 0
+    propagations = 0
+    solved = 0
+    for puzzle in puzzles:
+        for _ in range(repeat):
+            solver = ENGINES[engine]()
+            start = time.perf_counter()
+            ok = solver.load(puzzle) and solver.solve()
+            latencies.append(time.perf_counter() - start)
+            if ok and is_solution(puzzle, solver.solution_string()):
+                solved += 1
+            nodes.append(solver.nodes)
+            max_depth = max(max_depth, solver.max_depth)
+            propagations += solver.propagations
+    total_seconds = sum(latencies)
+    latencies.sort()
+    return {
+        "engine": engine,
+        "puzzles": len(puzzles),
+        "runs": len(latencies),
+        "solved": solved,
+        "total_seconds": round(total_seconds, 6),
+        "puzzles_per_second": round(len(latencies) / total_seconds, 3) if total_seconds else None,
+        "p50_ms": round(1000 * percentile(latencies, 0.5), 4),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 4),
+        "nodes_total": sum(nodes),
+        "nodes_max": max(nodes),
+        "max_backtrack_depth": max_depth,
+        "propagations": propagations,
+    }
+
+def benchmark_solvers(puzzle_sets: dict = BENCHMARK_PUZZLES, engines=tuple(ENGINES), repeat: int = 1) -> dict:
+    results = []
+    for name, puzzles in puzzle_sets.items():
+        for engine in engines:
+            results.append({"set": name, **benchmark_engine(engine, puzzles, repeat)})
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def read_puzzles(stream) -> Iterator[str]:
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+def main():
+    parser = argparse.ArgumentParser(description="Sudoku solver")
+    subparsers = parser.add_subparsers(dest="command")
+    batch_parser = subparsers.add_parser("batch", help="Solve one 81 character puzzle per line, unsolvable puzzles give an empty line")
+    batch_parser.add_argument("--input", "-i", default="-", help="Input file, or - for stdin")
+    batch_parser.add_argument("--output", "-o", default="-", help="Output file, or - for stdout")
+    batch_parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes, defaults to the number of CPUs")
+    batch_parser.add_argument("--chunk-size", type=int, default=DEFAULT_BATCH_CHUNK_SIZE, help="Puzzles per task sent to a worker")
+    batch_parser.add_argument("--engine", choices=sorted(ENGINES), default="mrv", help="Solver engine, dlx also solves 16x16 and 25x25 puzzles")
+    count_parser = subparsers.add_parser("count", help="Count the solutions of each puzzle, one per line")
+    count_parser.add_argument("--input", "-i", default="-", help="Input file, or - for stdin")
+    count_parser.add_argument("--output", "-o", default="-", help="Output file, or - for stdout")
+    count_parser.add_argument("--limit", type=int, default=2, help="Stop counting at this many solutions, 0 counts all")
+    benchmark_parser = subparsers.add_parser("benchmark", help="Time each engine on the easy, hard and pathological sets, written as JSON")
+    benchmark_parser.add_argument("--sets", default=",".join(BENCHMARK_PUZZLES), help=f"Comma separated sets out of {', '.join(BENCHMARK_PUZZLES)}")
+    benchmark_parser.add_argument("--puzzles", default=None, help="Benchmark the puzzles of this file instead, one per line")
+    benchmark_parser.add_argument("--engines", default=",".join(ENGINES), help=f"Comma separated engines out of {', '.join(ENGINES)}")
+    benchmark_parser.add_argument("--repeat", type=int, default=1, help="Solve every puzzle this many times")
+    benchmark_parser.add_argument("--output", "-o", default="-", help="Output .json file, or - for stdout")
+    args = parser.parse_args()
+    if args.command == "batch":
+        fin = sys.stdin if args.input == "-" else open(args.input)
+        fout = sys.stdout if args.output == "-" else open(args.output, "w")
+        with fin, fout:
+            for solution in solve_batch(read_puzzles(fin), args.jobs, args.chunk_size, args.engine):
+                fout.write((solution or "") + "\n")
+    elif args.command == "count":
+        fin = sys.stdin if args.input == "-" else open(args.input)
+        fout = sys.stdout if args.output == "-" else open(args.output, "w")
+        with fin, fout:
+            for puzzle in read_puzzles(fin):
+                fout.write(f"{count_solutions(puzzle, args.limit or None)}\n")
+    elif args.command == "benchmark":
+        if args.puzzles:
+            with open(args.puzzles) as fin:
+                puzzle_sets = {args.puzzles: list(read_puzzles(fin))}
+        else:
+            puzzle_sets = {name: BENCHMARK_PUZZLES[name] for name in args.sets.split(",")}
+        report = json.dumps(benchmark_solvers(puzzle_sets, args.engines.split(","), args.repeat), indent=2)
+        if args.output == "-":
+            print(report)
+        else:
+            with open(args.output, "w") as fout:
+                fout.write(report + "\n")
+    else:
+        Solution().solveSudokuLocal("4...3.......6..8..........1....5..9..8....6...7.2........1.27..5.3....4.9........")
+
+if __name__ == "__main__":
+    main()
+
+def test_solve_batch_invalid_lines():
+    puzzle = BENCHMARK_PUZZLES["easy"][0]
+    puzzles = [puzzle, "123", puzzle.replace("3", "x", 1), "11" + puzzle[2:], puzzle]
+    for jobs in [1, 2]:
+        solutions = list(solve_batch(puzzles, jobs=jobs, chunk_size=2))
+        assert solutions[1:4] == [None, None, None]
+        assert solutions[0] == solutions[4] and is_solution(puzzle, solutions[0])
+
+def pattern_solution(box_size: int) -> str:
+    # A solved grid: row r is the first row shifted by box_size * (r % box_size) + r // box_size.
+    size = box_size * box_size
+    return "".join(SYMBOLS[(box_size * (row % box_size) + row // box_size + col) % size] for row in range(size) for col in range(size))
+
+def test_dancing_links_small_and_large_grids():
+    for box_size in [2, 4]:
+        solution = pattern_solution(box_size)
+        puzzle = "".join("." if idx % 3 else char for idx, char in enumerate(solution))
+        solver = DancingLinksSolver()
+        assert solver.load(puzzle) and solver.solve()
+        assert is_solution(puzzle, solver.solution_string())
+
+def test_count_solutions():
+    # Swapping the 1 and 3 in the corners of a rectangle keeps the grid valid.
+    solution = pattern_solution(2)
+    assert solution[:8] == "12343412"
+    puzzle = "." + solution[1] + "." + solution[3:4] + "." + solution[5] + "." + solution[7:]
+    assert count_solutions(puzzle, None) == 2
+    assert count_solutions(puzzle, 2) == 2
+    assert count_solutions(solution) == 1
+    assert count_solutions("." * 16, None) == 288
+    assert count_solutions("11" + "." * 14) == 0
+
+def test_solve_batch_keeps_order():
+    puzzles = BENCHMARK_PUZZLES["easy"] + BENCHMARK_PUZZLES["hard"]
+    expected = [solve_puzzle(puzzle) for puzzle in puzzles]
+    for engine in ENGINES:
+        assert list(solve_batch(puzzles * 2, jobs=2, chunk_size=1, engine=engine)) == expected * 2
+
+def test_engines_agree():
+    # The first pathological puzzle has many solutions and takes the MRV
+    # engine tens of seconds, the others have exactly one.
+    puzzles = BENCHMARK_PUZZLES["easy"] + BENCHMARK_PUZZLES["hard"] + BENCHMARK_PUZZLES["pathological"][1:]
+    for puzzle in puzzles:
+        assert count_solutions(puzzle) == 1
+        solutions = [solve_puzzle(puzzle, engine()) for engine in ENGINES.values()]
+        assert solutions[0] == solutions[1] and is_solution(puzzle, solutions[0])
+
+def test_percentile():
+    assert percentile([1, 2, 3, 4, 5], 0.5) == 3
+    assert percentile(list(range(1, 10)), 0.5) == 5
+    assert percentile(list(range(1, 101)), 0.99) == 99
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    assert percentile([7], 0.99) == 7
+    assert percentile([1, 2, 3], 0) == 1 and percentile([1, 2, 3], 1) == 3
@@ -1,22 +1,83 @@
+# The zigzag repeats every cycle = 2 * (num_rows - 1) characters: row r gets
+# the characters at r and (for rows between the first and the last) at
+# cycle - r of every cycle. Each row is a pair of stride slices, interleaved
+# into its part of one output buffer, so no character is handled on its own.
+# Text in gives text out; bytes, bytearray and memoryview give bytes. A
+# memoryview is read as its bytes, whatever the format of its items.
+
+def row_slices(num_rows: int, n: int):
+    # Yields (output offset, size, slice down, slice up or None) per row.
+    cycle = 2 * (num_rows - 1)
+    offset = 0
+    for row in range(num_rows):
+        down = slice(row, n, cycle)
+        up = slice(cycle - row, n, cycle) if 0 < row < num_rows - 1 else None
+        size = len(range(row, n, cycle)) + (len(range(cycle - row, n, cycle)) if up else 0)
+        yield offset, size, down, up
+        offset += size
+
+def as_input(s):
+    # Slicing a memoryview of e.g. array('i') would give items, not bytes.
+    if isinstance(s, memoryview) and s.format != "B":
+        return s.cast("B")
+    return s
+
+def new_buffer(s, n: int):
+    return [""] * n if isinstance(s, str) else bytearray(n)
+
+def finish(s, buffer):
+    return "".join(buffer) if isinstance(s, str) else bytes(buffer)
+
+def zigzag_encode(s, num_rows: int):
+    s = as_input(s)
+    n = len(s)
+    if num_rows <= 1 or num_rows >= n:
+        return finish(s, s)
+    out = new_buffer(s, n)
+    for offset, size, down, up in row_slices(num_rows, n):
+        if up:
+            out[offset:offset + size:2] = s[down]
+            out[offset + 1:offset + size:2] = s[up]
+        else:
+            out[offset:offset + size] = s[down]
+    return finish(s, out)
+
+def zigzag_decode(s, num_rows: int):
+    # The inverse of zigzag_encode: each row segment goes back to its strides.
+    s = as_input(s)
+    n = len(s)
+    if num_rows <= 1 or num_rows >= n:
+        return finish(s, s)
+    out = new_buffer(s, n)
+    for offset, size, down, up in row_slices(num_rows, n):
+        if up:
+            out[down] = s[offset:offset + size:2]
+            out[up] = s[offset + 1:offset + size:2]
+        else:
+            out[down] = s[offset:offset + size]
+    return finish(s, out)
+
 class Solution:
     def convert(self, s: str, numRows: int) -> str:
-        rows = [[] for _ in range(numRows)]
-        select_next_row = self.next_row_generator(rows)
-        for letter in s:
-            row = next(select_next_row)
-            row.append(letter)
-        return self.collect(rows)
-    def next_row_generator(self, list_of_lists):
-        i = 0
-        n = len(list_of_lists)
-        indices = list(range(n))
-        indices.extend(list(range(1, n-1))[::-1])
-        while True:
-            yield list_of_lists[indices[i%len(indices)]]
-            i += 1
-    def collect(self, list_of_lists):
-        str = ""
-        for list in list_of_lists:
-            for letter in list:
-                str += letter
-        return str
\ No newline at end of file
+        return zigzag_encode(s, numRows)
+
+def test_round_trip():
+    import random
+    from array import array
+    rng = random.Random(0)
+    assert Solution().convert("PAYPALISHIRING", 3) == "PAHNAPLSIIGYIR"
+    assert Solution().convert("PAYPALISHIRING", 4) == "PINALSIGYAHRPI"
+    for _ in range(500):
+        text = "".join(rng.choice("abcdé") for _ in range(rng.randint(0, 40)))
+        num_rows = rng.randint(1, 45)
+        assert zigzag_decode(zigzag_encode(text, num_rows), num_rows) == text
+        data = text.encode()
+        encoded = zigzag_encode(data, num_rows)
+        if text.isascii():
+            assert encoded == zigzag_encode(text, num_rows).encode()
+        for buffer in (data, bytearray(data), memoryview(data)):
+            assert zigzag_encode(buffer, num_rows) == encoded
+            assert zigzag_decode(encoded, num_rows) == data
+    items = array("i", range(-5, 20))
+    assert zigzag_encode(memoryview(items), 4) == zigzag_encode(items.tobytes(), 4)
+    assert zigzag_decode(zigzag_encode(memoryview(items), 4), 4) == items.tobytes()